@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.html import escape, strip_tags
+
+
+class PrecompiledEmail:
+    """
+    Email template rendered once with placeholder slots.
+
+    The HTML and the strip_tags() plain-text variant are both built at
+    compile time and split around the slots, so sending only joins the
+    static parts with the escaped per-user values. Slots must be plain
+    {{ variable }} output, not used in {% if %} or other tags.
+    """
+
+    SLOT = '[[slot:{}]]'
+
+    def __init__(self, template_name, slots, context_builder=None):
+        self.template_name = template_name
+        self.slots = slots
+        self.context_builder = context_builder
+        self.slot_pattern = re.compile('|'.join(re.escape(self.SLOT.format(slot)) for slot in slots))
+        self.html_parts = None
+        self.plain_parts = None
+
+    def compile(self):
+        placeholders = {slot: self.SLOT.format(slot) for slot in self.slots}
+        context = {'app_name': getattr(settings, 'APP_NAME', 'Petropal')}
+        if self.context_builder:
+            context.update(self.context_builder(placeholders))
+        else:
+            context.update(placeholders)
+
+        html_message = get_template(self.template_name).render(context)
+        self.html_parts = self.split(html_message)
+        self.plain_parts = self.split(strip_tags(html_message))
+        return self
+
+    def split(self, text):
+        parts = []
+        position = 0
+        for match in self.slot_pattern.finditer(text):
+            parts.append(text[position:match.start()])
+            parts.append(match.group()[len('[[slot:'):-2])
+            position = match.end()
+        parts.append(text[position:])
+        return parts
+
+    def join(self, parts, values):
+        # Even indexes are static text, odd indexes are slot names
+        return ''.join(
+            part if index % 2 == 0 else values[part]
+            for index, part in enumerate(parts)
+        )
+
+    def render(self, **values):
+        """Return (html_message, plain_message) for the given slot values"""
+        if self.html_parts is None:
+            self.compile()
+        escaped = {slot: escape(values[slot]) for slot in self.slots}
+        return self.join(self.html_parts, escaped), self.join(self.plain_parts, escaped)
+
+
+def security_alert_context(placeholders):
+    # {{ user.full_name|default:user.email }} collapses into a single display_name slot
+    return {
+        'user': {'full_name': placeholders['display_name'], 'email': ''},
+        'event_type': placeholders['event_type'],
+        'details': placeholders['details'],
+    }
+
+
+@lru_cache(maxsize=None)
+def get_otp_email_template():
+    return PrecompiledEmail('email/otp_email.html', ['otp_code']).compile()
+
+
+@lru_cache(maxsize=None)
+def get_security_alert_template():
+    return PrecompiledEmail(
+        'email/security_alert.html',
+        ['display_name', 'event_type', 'details'],
+        context_builder=security_alert_context,
+    ).compile()
+
+
+def warm_email_templates():
+    get_otp_email_template()
+    get_security_alert_template()
@@ -0,0 +1,236 @@
+"""
+Outbound email queue.
+
+Requests only push a small payload onto a Redis list and make sure a flush
+task is scheduled. A Celery worker drains the list in batches, renders the
+messages and sends them over one SMTP connection that it keeps open between
+batches, so request latency no longer depends on the SMTP server.
+
+Draining moves each email onto a processing list and removes it from there
+only once it was sent. A failed send goes back on the outbox until
+EMAIL_OUTBOX_MAX_ATTEMPTS is reached, and whatever a crashed flush left on
+the processing list is re-queued by the next one. A lock keeps flushes from
+running concurrently, so the processing list only ever belongs to one.
+
+Payloads carry OTP codes, so they are Fernet-encrypted with a key derived
+from SECRET_KEY before they reach Redis, and an OTP email still queued after
+EMAIL_OUTBOX_OTP_MAX_AGE is dropped, as its code has expired anyway.
+"""
+import json
+import time
+import base64
+import hashlib
+import smtplib
+import logging
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.core import mail
+from utils.redis_client import get_redis
+from .utils import build_otp_email, build_security_alert
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = 'accounts:email_outbox'
+OUTBOX_SCHEDULED_KEY = 'accounts:email_outbox:scheduled'
+OUTBOX_PROCESSING_KEY = 'accounts:email_outbox:processing'
+OUTBOX_LOCK_KEY = 'accounts:email_outbox:lock'
+
+_connection = None
+_cipher = None
+
+
+def get_cipher():
+    global _cipher
+    if _cipher is None:
+        digest = hashlib.sha256(f"{settings.SECRET_KEY}:accounts.mailer".encode()).digest()
+        _cipher = Fernet(base64.urlsafe_b64encode(digest))
+    return _cipher
+
+
+def encode_payload(payload, queued_at=None):
+    """Encrypted outbox item, stamped with queued_at (now by default) so retries keep the original age"""
+    data = json.dumps(payload).encode()
+    if queued_at is None:
+        return get_cipher().encrypt(data)
+    return get_cipher().encrypt_at_time(data, queued_at)
+
+
+def decode_payload(item):
+    """(payload, queued_at), or (None, None) for an item that can't be decrypted"""
+    cipher = get_cipher()
+    try:
+        return json.loads(cipher.decrypt(item)), cipher.extract_timestamp(item)
+    except InvalidToken:
+        # e.g. queued before a SECRET_KEY rotation
+        logger.error("Dropping an outbox email that can't be decrypted")
+        return None, None
+
+
+def is_expired(payload, queued_at):
+    if payload['kind'] == 'otp' and time.time() - queued_at > settings.EMAIL_OUTBOX_OTP_MAX_AGE:
+        logger.warning(f"Dropping an expired {payload['purpose']} OTP email")
+        return True
+    return False
+
+
+def get_smtp_connection():
+    """Per-worker SMTP connection, reused across batches"""
+    global _connection
+    if _connection is None:
+        _connection = mail.get_connection(fail_silently=False)
+    return _connection
+
+
+def reset_smtp_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            pass
+    _connection = None
+
+
+def send_message(message):
+    """Send one message over the shared connection, reconnecting once if the server dropped it"""
+    for attempt in range(2):
+        connection = get_smtp_connection()
+        try:
+            connection.open()
+            return bool(connection.send_messages([message]))
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+            reset_smtp_connection()
+            if attempt:
+                logger.error(f"Failed to send email to {message.to}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Failed to send email to {message.to}: {str(e)}")
+            return False
+    return False
+
+
+def deliver(messages):
+    return sum(send_message(message) for message in messages)
+
+
+def build_message(payload):
+    kind = payload['kind']
+    if kind == 'otp':
+        return build_otp_email(payload['email'], payload['otp_code'], payload['purpose'])
+    if kind == 'security_alert':
+        from .models import Account
+        try:
+            user = Account.objects.get(acc_id=payload['user_id'])
+        except Account.DoesNotExist:
+            return None
+        return build_security_alert(user, payload['event_type'], payload['details'])
+    logger.error(f"Unknown email kind in outbox: {kind}")
+    return None
+
+
+def queue_email(payload):
+    try:
+        client = get_redis()
+        client.rpush(OUTBOX_KEY, encode_payload(payload))
+    except Exception as e:
+        # Never lose an OTP because the queue is down, send it inline instead
+        logger.warning(f"Email queue unavailable, sending inline: {str(e)}")
+        message = build_message(payload)
+        return bool(message and deliver([message]))
+
+    try:
+        if client.set(OUTBOX_SCHEDULED_KEY, 1, nx=True, ex=settings.EMAIL_OUTBOX_SCHEDULE_TTL):
+            from .tasks import flush_email_outbox_task
+            flush_email_outbox_task.delay()
+    except Exception as e:
+        # Already queued; the periodic flush sends it
+        logger.warning(f"Could not schedule an email outbox flush: {str(e)}")
+    return True
+
+
+def queue_otp_email(email, otp_code, purpose):
+    return queue_email({
+        'kind': 'otp',
+        'email': email,
+        'otp_code': otp_code,
+        'purpose': purpose,
+    })
+
+
+def queue_security_alert(user, event_type, details):
+    return queue_email({
+        'kind': 'security_alert',
+        'user_id': user.acc_id,
+        'event_type': event_type,
+        'details': details,
+    })
+
+
+def requeue_unacknowledged(client):
+    """Put emails a crashed flush left on the processing list back at the head of the outbox"""
+    requeued = 0
+    while client.lmove(OUTBOX_PROCESSING_KEY, OUTBOX_KEY, 'RIGHT', 'LEFT') is not None:
+        requeued += 1
+    if requeued:
+        logger.warning(f"Re-queued {requeued} unacknowledged emails")
+
+
+def take_batch(client):
+    pipe = client.pipeline(transaction=False)
+    for _ in range(settings.EMAIL_OUTBOX_BATCH_SIZE):
+        pipe.lmove(OUTBOX_KEY, OUTBOX_PROCESSING_KEY, 'LEFT', 'RIGHT')
+    return [item for item in pipe.execute() if item is not None]
+
+
+def retry_later(client, item, payload, queued_at):
+    attempts = payload.get('attempts', 0) + 1
+    pipe = client.pipeline()
+    if attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        pipe.rpush(OUTBOX_KEY, encode_payload({**payload, 'attempts': attempts}, queued_at))
+    else:
+        logger.error(f"Dropping {payload['kind']} email after {attempts} failed attempts")
+    pipe.lrem(OUTBOX_PROCESSING_KEY, 1, item)
+    pipe.execute()
+
+
+def flush_outbox():
+    """Drain the outbox in batches. Returns the number of emails sent."""
+    client = get_redis()
+    if not client.set(OUTBOX_LOCK_KEY, 1, nx=True, ex=settings.EMAIL_OUTBOX_LOCK_TTL):
+        return 0
+
+    sent = 0
+    failed = False
+    try:
+        # Cleared before draining so anything queued from now on schedules another flush
+        client.delete(OUTBOX_SCHEDULED_KEY)
+        requeue_unacknowledged(client)
+
+        while not failed:
+            batch = take_batch(client)
+            if not batch:
+                break
+            for item in batch:
+                payload, queued_at = decode_payload(item)
+                message = None
+                if payload is not None and not is_expired(payload, queued_at):
+                    message = build_message(payload)
+                if message is None or send_message(message):
+                    sent += message is not None
+                    client.lrem(OUTBOX_PROCESSING_KEY, 1, item)
+                else:
+                    retry_later(client, item, payload, queued_at)
+                    # Likely an SMTP outage; the rest waits for a later flush
+                    failed = True
+                    break
+            client.expire(OUTBOX_LOCK_KEY, settings.EMAIL_OUTBOX_LOCK_TTL)
+        requeue_unacknowledged(client)
+    finally:
+        client.delete(OUTBOX_LOCK_KEY)
+
+    if failed and client.set(OUTBOX_SCHEDULED_KEY, 1, nx=True, ex=settings.EMAIL_OUTBOX_SCHEDULE_TTL):
+        from .tasks import flush_email_outbox_task
+        flush_email_outbox_task.apply_async(countdown=settings.EMAIL_OUTBOX_RETRY_DELAY)
+
+    if sent:
+        logger.info(f"Sent {sent} queued emails")
+    return sent
@@ -0,0 +1,57 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from accounts.email_templates import get_otp_email_template, get_security_alert_template
+
+
+class Command(BaseCommand):
+    help = 'Compare per-message render cost of render_to_string + strip_tags against the precompiled email templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        app_name = getattr(settings, 'APP_NAME', 'Petropal')
+        details = {'ip_address': '203.0.113.7', 'user_agent': 'Mozilla/5.0', 'timestamp': '2025-01-01T00:00:00'}
+
+        def render_otp():
+            html_message = render_to_string('email/otp_email.html', {
+                'otp_code': '482913', 'purpose': 'login', 'app_name': app_name
+            })
+            return html_message, strip_tags(html_message)
+
+        def render_alert():
+            html_message = render_to_string('email/security_alert.html', {
+                'user': {'full_name': 'Jane Doe', 'email': 'jane@example.com'},
+                'event_type': 'Password Reset', 'details': details, 'app_name': app_name
+            })
+            return html_message, strip_tags(html_message)
+
+        otp_template = get_otp_email_template()
+        alert_template = get_security_alert_template()
+
+        cases = [
+            ('otp_email', render_otp, lambda: otp_template.render(otp_code='482913')),
+            ('security_alert', render_alert, lambda: alert_template.render(
+                display_name='Jane Doe', event_type='Password Reset', details=details)),
+        ]
+
+        for label, render_legacy, render_precompiled in cases:
+            if render_legacy() != render_precompiled():
+                self.stderr.write(self.style.ERROR(f'{label}: precompiled output differs from render_to_string'))
+
+            legacy = self.time_per_call(render_legacy, iterations)
+            precompiled = self.time_per_call(render_precompiled, iterations)
+            self.stdout.write(
+                f'{label:<16} render_to_string+strip_tags: {legacy:8.1f}us   '
+                f'precompiled: {precompiled:6.1f}us   ({legacy / precompiled:.0f}x)'
+            )
+
+    def time_per_call(self, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations * 1e6
@@ -1,8 +1,8 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseForbidden
-from django.core.cache import cache
 from django.conf import settings
-import time
+from .ratelimit import RateLimiter, load_rules
+import math
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,10 +11,17 @@ logger = logging.getLogger(__name__)
 class SecurityMiddleware(MiddlewareMixin):
     """Security middleware for rate limiting and security headers"""
     
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.rules = load_rules()
+        self.limiter = RateLimiter()
+    
     def process_request(self, request):
         # Rate limiting
         if self.is_rate_limited(request):
-            return HttpResponseForbidden("Rate limit exceeded")
+            response = HttpResponseForbidden("Rate limit exceeded")
+            response['Retry-After'] = max(1, math.ceil(request.rate_limit_retry_after))
+            return response
         
         return None
     
@@ -29,41 +36,18 @@ class SecurityMiddleware(MiddlewareMixin):
         return response
     
     def is_rate_limited(self, request):
-        """Check if request is rate limited"""
+        """Check if request is rate limited by the first matching rule"""
         if not hasattr(settings, 'RATE_LIMIT_ENABLED') or not settings.RATE_LIMIT_ENABLED:
             return False
         
-        # Get client IP
-        ip = self.get_client_ip(request)
-        
-        # Different limits for different endpoints
-        if request.path.startswith('/api/auth/login'):
-            return self.check_rate_limit(f"login_{ip}", 5, 300)  # 5 attempts per 5 minutes
-        elif request.path.startswith('/api/auth/register'):
-            return self.check_rate_limit(f"register_{ip}", 3, 3600)  # 3 attempts per hour
-        elif request.path.startswith('/api/auth/'):
-            return self.check_rate_limit(f"auth_{ip}", 20, 60)  # 20 requests per minute
-        
-        return False
-    
-    def check_rate_limit(self, key, limit, window):
-        """Check rate limit for a given key"""
-        current_time = int(time.time())
-        window_start = current_time - window
-        
-        # Get existing requests in the window
-        requests = cache.get(key, [])
-        
-        # Filter out old requests
-        requests = [req_time for req_time in requests if req_time > window_start]
-        
-        # Check if limit exceeded
-        if len(requests) >= limit:
-            return True
-        
-        # Add current request
-        requests.append(current_time)
-        cache.set(key, requests, window)
+        for rule in self.rules:
+            if rule.matches(request):
+                ip = self.get_client_ip(request)
+                allowed, retry_after = self.limiter.hit(f"{rule.name}:{ip}", rule.limit, rule.window)
+                if not allowed:
+                    request.rate_limit_retry_after = retry_after
+                    logger.warning(f"Rate limit '{rule.name}' exceeded for {ip}")
+                return not allowed
         
         return False
     
@@ -0,0 +1,81 @@
+"""
+GCRA (generic cell rate algorithm) rate limiting backed by Redis.
+
+Each key stores a single "theoretical arrival time", so memory per key is
+constant whatever the limit is. The check-and-update runs inside one Lua
+script using the Redis server clock, which makes it atomic across workers.
+"""
+import logging
+from django.conf import settings
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if allow_at > now then
+    return {0, allow_at - now}
+end
+
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+class RateLimitRule:
+    def __init__(self, name, path, limit, window, methods=None):
+        self.name = name
+        self.path = path
+        self.limit = limit
+        self.window = window
+        self.methods = {method.upper() for method in methods} if methods else None
+
+    def matches(self, request):
+        if not request.path.startswith(self.path):
+            return False
+        return self.methods is None or request.method in self.methods
+
+
+class RateLimiter:
+    """Allows `limit` requests per `window` seconds per key, with bursts up to `limit`"""
+
+    def __init__(self, prefix='ratelimit'):
+        self.prefix = prefix
+        self._script = None
+
+    @property
+    def script(self):
+        if self._script is None:
+            self._script = get_redis().register_script(GCRA_SCRIPT)
+        return self._script
+
+    def hit(self, key, limit, window):
+        """Record a request. Returns (allowed, retry_after_seconds)."""
+        interval_ms = int(window * 1000 / limit)
+        window_ms = int(window * 1000)
+        try:
+            allowed, retry_after_ms = self.script(
+                keys=[f"{self.prefix}:{key}"],
+                args=[interval_ms, window_ms]
+            )
+        except Exception as e:
+            # Fail open: an unreachable Redis must not take the API down with it
+            logger.warning(f"Rate limiter unavailable: {str(e)}")
+            return True, 0
+        return bool(allowed), retry_after_ms / 1000
+
+
+def load_rules():
+    return [RateLimitRule(**rule) for rule in getattr(settings, 'RATE_LIMIT_RULES', [])]
@@ -6,6 +6,7 @@ from django.conf import settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import Account, OTPCode
 from .utils import send_otp_email, send_otp_sms
+from .mailer import queue_otp_email
 
 
 
@@ -37,7 +38,7 @@ class AccountRegistrationSerializer(serializers.ModelSerializer):
         otp = OTPCode.generate_code(user, 'registration')
         
         #send only via email
-        send_otp_email(user.email, otp.code, 'registration')
+        queue_otp_email(user.email, otp.code, 'registration')
         
         return user
 
@@ -316,7 +317,7 @@ class PasswordResetRequestSerializer(serializers.Serializer):
         otp = OTPCode.generate_code(user, 'password_reset')
         
         # Send OTP via email
-        send_otp_email(user.email, otp.code, 'password_reset')
+        queue_otp_email(user.email, otp.code, 'password_reset')
         
         return {
             'acc_id': user.acc_id,
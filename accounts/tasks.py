@@ -1,27 +1,12 @@
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
-from .utils import send_otp_email, send_otp_sms, send_security_alert
+from .mailer import flush_outbox
 
 
 @shared_task
-def send_otp_email_task(email, otp_code, purpose):
-    return send_otp_email(email, otp_code, purpose)
-
-
-@shared_task
-def send_otp_sms_task(phone, otp_code):
-    return send_otp_sms(phone, otp_code)
-
-
-@shared_task
-def send_security_alert_task(user_id, event_type, details):
-    from .models import Account
-    try:
-        user = Account.objects.get(acc_id=user_id)
-        return send_security_alert(user, event_type, details)
-    except Account.DoesNotExist:
-        return False
+def flush_email_outbox_task():
+    return flush_outbox()
 
 
 @shared_task
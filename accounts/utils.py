@@ -1,8 +1,7 @@
 import requests
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from .email_templates import get_otp_email_template, get_security_alert_template
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,32 +26,27 @@ def get_device_info(request):
     }
 
 
+# Build the OTP email message
+def build_otp_email(email, otp_code, purpose):
+    subject_map = {
+        'login': 'Your Login OTP Code',
+        'registration': 'Welcome to Petropal, Please Verify Your Account',
+        'password_reset': 'Password Reset OTP Code',
+    }
+    
+    subject = subject_map.get(purpose, 'Your OTP Code')
+    
+    html_message, plain_message = get_otp_email_template().render(otp_code=otp_code)
+    
+    message = EmailMultiAlternatives(subject, plain_message, settings.DEFAULT_FROM_EMAIL, [email])
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
 # Function to send OTP via email
 def send_otp_email(email, otp_code, purpose):
     try:
-        subject_map = {
-            'login': 'Your Login OTP Code',
-            'registration': 'Welcome to Petropal, Please Verify Your Account',
-            'password_reset': 'Password Reset OTP Code',
-        }
-        
-        subject = subject_map.get(purpose, 'Your OTP Code')
-        
-        html_message = render_to_string('email/otp_email.html', {
-            'otp_code': otp_code,
-            'purpose': purpose,
-            'app_name': getattr(settings, 'APP_NAME', 'Petropal')
-        })
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        build_otp_email(email, otp_code, purpose).send(fail_silently=False)
         
         logger.info(f"OTP email sent to {email} for purpose: {purpose}")
         return True
@@ -84,31 +78,29 @@ def send_otp_sms(phone, otp_code):
         return False
 
 
+# Build the security alert email message
+def build_security_alert(user, event_type, details):
+    subject = f"Security Alert - {event_type}"
+    
+    html_message, plain_message = get_security_alert_template().render(
+        display_name=user.full_name or user.email,
+        event_type=event_type,
+        details=details,
+    )
+    
+    message = EmailMultiAlternatives(subject, plain_message, settings.DEFAULT_FROM_EMAIL, [user.email])
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
 # Function to send security alert email
 def send_security_alert(user, event_type, details):
     try:
-        subject = f"Security Alert - {event_type}"
-        
-        html_message = render_to_string('email/security_alert.html', {
-            'user': user,
-            'event_type': event_type,
-            'details': details,
-            'app_name': getattr(settings, 'APP_NAME', 'Petropal')
-        })
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        build_security_alert(user, event_type, details).send(fail_silently=False)
         
         logger.info(f"Security alert sent to {user.email} for event: {event_type}")
         return True
         
     except Exception as e:
         logger.error(f"Failed to send security alert to {user.email}: {str(e)}")
-        return False
\ No newline at end of file
+        return False
@@ -13,6 +13,7 @@ from .serializers import (
 )
 from .models import Account, OTPCode, RefreshToken as CustomRefreshToken
 from .utils import get_client_ip, get_device_info, send_otp_email, send_otp_sms
+from .mailer import queue_otp_email, queue_security_alert
 
 
 
@@ -144,7 +145,7 @@ class ResendOTPView(APIView):
         otp = OTPCode.generate_code(user, purpose)
 
         # Send OTP
-        send_otp_email(user.email, otp.code, purpose)
+        queue_otp_email(user.email, otp.code, purpose)
 
         return Response({
             'message': f'{purpose.capitalize()} OTP resent successfully'
@@ -356,7 +357,7 @@ class PasswordResetConfirmView(APIView):
         OTPCode.objects.filter(user=user, purpose='password_reset', is_used=False).update(is_used=True)
         
         # Send security alert email
-        send_security_alert(user, 'Password Reset', {
+        queue_security_alert(user, 'Password Reset', {
             'ip_address': get_client_ip(request),
             'user_agent': request.META.get('HTTP_USER_AGENT', ''),
             'timestamp': timezone.now().isoformat()
@@ -399,7 +400,7 @@ class PasswordResetResendOTPView(APIView):
             otp = OTPCode.generate_code(user, 'password_reset')
             
             # Send OTP via email
-            send_otp_email(user.email, otp.code, 'password_reset')
+            queue_otp_email(user.email, otp.code, 'password_reset')
             
             return Response({
                 'message': 'Password reset OTP resent successfully.',
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        # Registers the membership cache signal receivers
+        from . import membership  # noqa: F401
+
+        if settings.MEDIA_SPOOL_AUTOSTART:
+            # Replicate media left in the spool by a previous run
+            from .storage_backends import start_spool_uploader
+            start_spool_uploader()
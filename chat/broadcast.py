@@ -0,0 +1,60 @@
+"""
+Group broadcasts for chat WebSockets.
+
+The sender encodes the client frame once and ships the JSON text in the
+channel-layer event; every consumer in the group forwards it verbatim rather
+than re-encoding the same payload per member. Fields consumers need for
+per-recipient filtering (the acting user's acc_id, a message id) travel next
+to the frame as plain values.
+
+Frames that embed user objects also carry a compact "delta" encoding for
+connections that negotiated it (chat.protocol): users are replaced by their
+acc_id and their snapshots ride separately, each encoded once.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from utils.json_encoding import dumps
+
+
+def conversation_group(conversation_id):
+    return f"chat_{conversation_id}"
+
+
+def is_user_data(value):
+    # UserDisplaySerializer output
+    return isinstance(value, dict) and 'acc_id' in value and 'display_name' in value
+
+
+def compact_frame(frame, profiles):
+    """Copy of frame with embedded users replaced by acc_id, collecting them into profiles"""
+    if is_user_data(frame):
+        profiles[frame['acc_id']] = frame
+        return frame['acc_id']
+    if isinstance(frame, dict):
+        return {key: compact_frame(value, profiles) for key, value in frame.items()}
+    if isinstance(frame, list):
+        return [compact_frame(item, profiles) for item in frame]
+    return frame
+
+
+def broadcast_event(handler, frame, **routing):
+    """Channel-layer event for `handler` carrying the pre-encoded client frame"""
+    event = {"type": handler, "frame": dumps(frame), **routing}
+    profiles = {}
+    delta = compact_frame(frame, profiles)
+    if profiles:
+        event["delta"] = dumps(delta)
+        event["profiles"] = {acc_id: dumps(user) for acc_id, user in profiles.items()}
+    return event
+
+
+def send_to_conversations(conversation_ids, handler, frame, **routing):
+    """Broadcast from synchronous code (views, tasks), encoding the frame once for every group"""
+    channel_layer = get_channel_layer()
+    event = broadcast_event(handler, frame, **routing)
+    for conversation_id in conversation_ids:
+        async_to_sync(channel_layer.group_send)(conversation_group(conversation_id), event)
+
+
+def send_to_conversation(conversation_id, handler, frame, **routing):
+    send_to_conversations([conversation_id], handler, frame, **routing)
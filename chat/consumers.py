@@ -1,12 +1,12 @@
-import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from chat.models import (
     Conversation, Message, MessageReaction, UserStatus, 
-    MessageReadStatus, MessageDeletion, ConversationDeletion
+    MessageReadStatus, MessageDeletion
 )
 from chat.serializers import MessageSerializer, UserDisplaySerializer, MessageReactionSerializer
 import uuid
@@ -15,24 +15,23 @@ from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from jwt import decode as jwt_decode
 from django.conf import settings
-from django.core.serializers.json import DjangoJSONEncoder
-from datetime import datetime, date
-from uuid import UUID
-from decimal import Decimal
+from chat.broadcast import broadcast_event, conversation_group
+from chat.membership import can_access, is_participant
+from chat.metrics import flush_frame_metrics, record_frame
+from chat.protocol import decode_frame, negotiate_subprotocol
+from utils.json_encoding import dumps
 
 
 Account = get_user_model()
 
-class DateTimeAwareJSONEncoder(DjangoJSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
-        self.room_group_name = f"chat_{self.conversation_id}"
+        self.room_group_name = conversation_group(self.conversation_id)
+        # Opt-in msgpack, delta and deflate frames, see chat.protocol
+        self.subprotocol, self.wire_format = negotiate_subprotocol(self.scope.get('subprotocols'))
+        # acc_id -> profile snapshot last sent to this delta connection
+        self.sent_profiles = {}
 
         await self.authenticate_user()
 
@@ -51,7 +50,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
-        await self.accept()
+        await self.accept(subprotocol=self.subprotocol)
 
         await self.set_user_status('online')
         await self.broadcast_status_change('online')
@@ -67,9 +66,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.set_user_status('offline')
             await self.broadcast_status_change('offline')
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = decode_frame(text_data, bytes_data)
+        except ValueError:
+            await self.send_error("Invalid JSON format" if bytes_data is None else "Invalid msgpack format")
+            return
+
         try:
-            data = json.loads(text_data)
             event_type = data.get("type")
 
             if event_type == "chat_message":
@@ -88,8 +92,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.handle_ping()
             else:
                 await self.send_error("Unknown event type")
-        except json.JSONDecodeError:
-            await self.send_error("Invalid JSON format")
         except Exception as e:
             await self.send_error(f"Server error: {str(e)}")
 
@@ -138,19 +140,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
         message_type = data.get("message_type", "text")
 
         if message_type == "file" and attachment_url:
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "chat_message_broadcast",
-                    "message": {
-                        "message_content": "",
-                        "message_type": "file",
-                        "attachment": attachment_url,
-                        "sender": await self.get_user_data(),
-                        "timestamp": timezone.now().isoformat(),
-                    }
+            await self.broadcast("chat_message_broadcast", {
+                "type": "chat_message",
+                "message": {
+                    "message_content": "",
+                    "message_type": "file",
+                    "attachment": attachment_url,
+                    "sender": await self.get_user_data(),
+                    "timestamp": timezone.now().isoformat(),
                 }
-            )
+            })
             return
             
         # message_content = data.get("message", "").strip()
@@ -172,13 +171,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
             serialized_message = await self.serialize_message(message)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "chat_message_broadcast",
-                    "message": serialized_message
-                }
-            )
+            await self.broadcast("chat_message_broadcast", {
+                "type": "chat_message",
+                "message": serialized_message
+            })
 
             await self.clear_typing_status()
 
@@ -202,13 +198,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
             serialized_message = await self.serialize_message(message)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "message_edited_broadcast",
-                    "message": serialized_message
-                }
-            )
+            await self.broadcast("message_edited_broadcast", {
+                "type": "message_edited",
+                "message": serialized_message
+            })
 
         except Exception as e:
             await self.send_error(f"Failed to edit message: {str(e)}")
@@ -227,15 +220,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
         try:
             await self.delete_message_for_user(message_id)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "message_deleted_broadcast",
-                    "message_id": message_id,
-                    "user_data": await self.get_user_data(),
-                    "timestamp": timezone.now().isoformat()
-                }
-            )
+            await self.broadcast("message_deleted_broadcast", {
+                "type": "message_deleted",
+                "message_id": message_id,
+                "user_data": await self.get_user_data(),
+                "timestamp": timezone.now().isoformat()
+            }, message_id=message_id)
 
         except Exception as e:
             await self.send_error(f"Failed to delete message: {str(e)}")
@@ -255,18 +245,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
         try:
             action, reaction_data = await self.toggle_reaction(message_id, reaction)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "reaction_broadcast",
-                    "message_id": message_id,
-                    "reaction": reaction,
-                    "user_data": await self.get_user_data(),
-                    "action": action,  
-                    "reaction_data": reaction_data,  
-                    "timestamp": timezone.now().isoformat()
-                }
-            )
+            await self.broadcast("reaction_broadcast", {
+                "type": "reaction",
+                "message_id": message_id,
+                "reaction": reaction,
+                "user_data": await self.get_user_data(),
+                "action": action,
+                "reaction_data": reaction_data,
+                "timestamp": timezone.now().isoformat()
+            })
         except Exception as e:
             await self.send_error(f"Failed to process reaction: {str(e)}")
 
@@ -282,15 +269,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.mark_message_read(message_id)
 
             # Broadcast read receipt to all users in the conversation
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "read_receipt_broadcast",
-                    "message_id": message_id,
-                    "user_data": await self.get_user_data(),
-                    "read_at": timezone.now().isoformat()
-                }
-            )
+            await self.broadcast("read_receipt_broadcast", {
+                "type": "read_receipt",
+                "message_id": message_id,
+                "user_data": await self.get_user_data(),
+                "read_at": timezone.now().isoformat()
+            }, sender_id=self.user.acc_id)
         except Exception as e:
             await self.send_error(f"Failed to mark message as read: {str(e)}")
 
@@ -303,133 +287,117 @@ class ChatConsumer(AsyncWebsocketConsumer):
         try:
             await self.set_typing_status(is_typing)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "user_typing_broadcast",
-                    "user_data": await self.get_user_data(),
-                    "is_typing": is_typing,
-                    "timestamp": timezone.now().isoformat()
-                }
-            )
+            await self.broadcast("user_typing_broadcast", {
+                "type": "user_typing",
+                "user_data": await self.get_user_data(),
+                "is_typing": is_typing,
+                "timestamp": timezone.now().isoformat()
+            }, sender_id=self.user.acc_id)
         except Exception as e:
             await self.send_error(f"Failed to update typing status: {str(e)}")
 
     async def handle_ping(self):
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             "type": "pong",
             "timestamp": timezone.now().isoformat()
-        }, cls=DateTimeAwareJSONEncoder))
+        })
 
 
+    # Group handlers: the frame was encoded once by the sender (chat.broadcast)
+
     async def chat_message_broadcast(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "chat_message",
-            "message": event["message"]
-        }, cls=DateTimeAwareJSONEncoder))
+        await self.forward_frame(event)
 
     async def message_edited_broadcast(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "message_edited",
-            "message": event["message"]
-        }, cls=DateTimeAwareJSONEncoder))
+        await self.forward_frame(event)
 
     async def message_deleted_broadcast(self, event):
-        message_id = event["message_id"]
-        user_has_deleted = await self.user_has_deleted_message(message_id)
-        
+        user_has_deleted = await self.user_has_deleted_message(event["message_id"])
+
         if not user_has_deleted:
-            await self.send(text_data=json.dumps({
-                "type": "message_deleted",
-                "message_id": message_id,
-                "user_data": event["user_data"],
-                "timestamp": event["timestamp"]
-            }, cls=DateTimeAwareJSONEncoder))
+            await self.forward_frame(event)
 
     async def message_restored_broadcast(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "message_restored",
-            "message": event["message"]
-        }, cls=DateTimeAwareJSONEncoder))
+        await self.forward_frame(event)
 
     async def reaction_broadcast(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "reaction",
-            "message_id": event["message_id"],
-            "reaction": event["reaction"],
-            "user_data": event["user_data"],
-            "action": event["action"],
-            "reaction_data": event.get("reaction_data"),
-            "timestamp": event["timestamp"]
-        }, cls=DateTimeAwareJSONEncoder))
+        await self.forward_frame(event)
 
     async def read_receipt_broadcast(self, event):
-        if hasattr(self, 'user') and self.user and event["user_data"]["acc_id"] != self.user.acc_id:
-            await self.send(text_data=json.dumps({
-                "type": "read_receipt",
-                "message_id": event["message_id"],
-                "user_data": event["user_data"],
-                "read_at": event["read_at"]
-            }, cls=DateTimeAwareJSONEncoder))
+        if self.is_other_user(event["sender_id"]):
+            await self.forward_frame(event)
 
     async def user_typing_broadcast(self, event):
-        if hasattr(self, 'user') and self.user and event["user_data"]["acc_id"] != self.user.acc_id:
-            await self.send(text_data=json.dumps({
-                "type": "user_typing",
-                "user_data": event["user_data"],
-                "is_typing": event["is_typing"],
-                "timestamp": event["timestamp"]
-            }, cls=DateTimeAwareJSONEncoder))
+        if self.is_other_user(event["sender_id"]):
+            await self.forward_frame(event)
 
     async def status_broadcast(self, event):
-        if hasattr(self, 'user') and self.user and event["user_data"]["acc_id"] != self.user.acc_id:
-            await self.send(text_data=json.dumps({
-                "type": "user_status",
-                "user_data": event["user_data"],
-                "status": event["status"],
-                "timestamp": event["timestamp"]
-            }, cls=DateTimeAwareJSONEncoder))
+        if self.is_other_user(event["sender_id"]):
+            await self.forward_frame(event)
+
+    async def forward_frame(self, event):
+        text = event["frame"]
+        if self.wire_format.delta and "delta" in event:
+            await self.send_profiles(event["profiles"])
+            text = event["delta"]
+        await self.send_encoded(event["type"].removesuffix("_broadcast"), self.wire_format.encode_text(text))
+
+    async def send_profiles(self, profiles):
+        changed = {
+            acc_id: snapshot for acc_id, snapshot in profiles.items()
+            if self.sent_profiles.get(acc_id) != snapshot
+        }
+        if not changed:
+            return
+        self.sent_profiles.update(changed)
+        # Snapshots are already JSON: splice them in instead of re-encoding
+        entries = ','.join(f'{dumps(acc_id)}:{snapshot}' for acc_id, snapshot in changed.items())
+        text = f'{{"type":"profiles","profiles":{{{entries}}}}}'
+        await self.send_encoded("profiles", self.wire_format.encode_text(text, cached=False))
+
+    async def send_frame(self, frame):
+        await self.send_encoded(frame["type"], self.wire_format.encode(frame))
+
+    async def send_encoded(self, event_type, data):
+        if isinstance(data, str):
+            await self.send(text_data=data)
+            size = len(data) if data.isascii() else len(data.encode())
+        else:
+            await self.send(bytes_data=data)
+            size = len(data)
+        if record_frame(event_type, self.wire_format.name, size):
+            await sync_to_async(flush_frame_metrics, thread_sensitive=False)()
 
-    async def broadcast_status_change(self, status):
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "status_broadcast",
-                "user_data": await self.get_user_data(),
-                "status": status,
-                "timestamp": timezone.now().isoformat()
-            }
-        )
+    def is_other_user(self, acc_id):
+        return hasattr(self, 'user') and self.user and acc_id != self.user.acc_id
+
+    async def broadcast(self, handler, frame, **routing):
+        await self.channel_layer.group_send(self.room_group_name, broadcast_event(handler, frame, **routing))
 
-  
+    async def broadcast_status_change(self, status):
+        await self.broadcast("status_broadcast", {
+            "type": "user_status",
+            "user_data": await self.get_user_data(),
+            "status": status,
+            "timestamp": timezone.now().isoformat()
+        }, sender_id=self.user.acc_id)
 
     async def send_error(self, message):
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             "type": "error",
             "message": message,
             "timestamp": timezone.now().isoformat()
-        }, cls=DateTimeAwareJSONEncoder))
+        })
 
     @database_sync_to_async
     def get_user_data(self):
         """Get serialized user data for broadcasting"""
         serializer = UserDisplaySerializer(self.user)
-        data = serializer.data
-        return self.serialize_datetime_objects(data)
+        return serializer.data
 
     @database_sync_to_async
     def verify_conversation_access(self):
-        try:
-            conversation = Conversation.objects.get(
-                conversation_id=self.conversation_id,
-                participants=self.user
-            )
-            return not ConversationDeletion.objects.filter(
-                conversation=conversation,
-                user=self.user
-            ).exists()
-        except Conversation.DoesNotExist:
-            return False
+        return can_access(self.user, self.conversation_id)
 
     @database_sync_to_async
     def save_message(self, content, reply_to_id=None, attachment=None, message_type="text"):
@@ -478,7 +446,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     def delete_message_for_user(self, message_id):
         message = get_object_or_404(Message, message_id=message_id)
         
-        if not message.conversation.participants.filter(acc_id=self.user.acc_id).exists():
+        if not is_participant(self.user, message.conversation_id):
             raise Exception("You do not have permission to delete this message")
         
         MessageDeletion.objects.get_or_create(
@@ -501,26 +469,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.user = user
         
         mock_request = MockRequest(self.user)
-        serializer = MessageSerializer(message, context={'request': mock_request})
-        data = serializer.data
-        return self.serialize_datetime_objects(data)
+        serializer = MessageSerializer(message, context={'request': mock_request, 'broadcast': True})
+        return serializer.data
         
-    def serialize_datetime_objects(self, obj):
-        if isinstance(obj, dict):
-            return {key: self.serialize_datetime_objects(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self.serialize_datetime_objects(item) for item in obj]
-        elif isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        elif isinstance(obj, UUID):
-            return str(obj)
-        elif isinstance(obj, Decimal):
-            return float(obj)
-        elif hasattr(obj, 'isoformat'):  
-            return obj.isoformat()
-        else:
-            return obj
-
     @database_sync_to_async
     def toggle_reaction(self, message_id, reaction):
         try:
@@ -536,8 +487,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 return "removed", None
             else:
                 serializer = MessageReactionSerializer(reaction_obj)
-                data = serializer.data
-                return "added", self.serialize_datetime_objects(data)
+                return "added", serializer.data
         except Message.DoesNotExist:
             raise Exception("Message not found")
 
@@ -0,0 +1,81 @@
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from utils import json_encoding
+
+
+def legacy_walk(obj):
+    # The recursive pre-pass broadcasts used before utils.json_encoding
+    if isinstance(obj, dict):
+        return {key: legacy_walk(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [legacy_walk(item) for item in obj]
+    if isinstance(obj, (uuid.UUID, Decimal)) or hasattr(obj, 'isoformat'):
+        return json_encoding.default(obj)
+    return obj
+
+
+def sample_user(index, now):
+    return {
+        'acc_id': uuid.uuid4().hex,
+        'email': f'user{index}@example.com',
+        'display_name': f'User {index}',
+        'profile_picture': f'/media/profile_pics/user{index}.jpg',
+        'status': {'status': 'online', 'last_seen': now - timedelta(minutes=index)},
+    }
+
+
+def sample_message(reactions, now):
+    """A chat_message broadcast shaped like MessageSerializer output"""
+    return {
+        'type': 'chat_message',
+        'message': {
+            'message_id': uuid.uuid4(),
+            'content': 'Shipment of 20,000 litres confirmed for Thursday morning.',
+            'timestamp': now,
+            'message_type': 'text',
+            'attachment': None,
+            'file_size': Decimal('0'),
+            'sender': sample_user(0, now),
+            'is_edited': False,
+            'edited_at': None,
+            'reactions': [
+                {'reaction': 'like', 'user': sample_user(index, now), 'created_at': now}
+                for index in range(1, reactions + 1)
+            ],
+            'reaction_counts': {'like': reactions},
+            'reply_to': None,
+            'is_deleted_by_me': False,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time broadcast payload encoding: legacy walk + json.dumps against utils.json_encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--reactions', type=int, default=5, help='Reactions on the sample message')
+
+    def handle(self, *args, **options):
+        payload = sample_message(options['reactions'], datetime.now(dt_timezone.utc))
+        iterations = options['iterations']
+
+        candidates = {
+            'legacy walk + json.dumps': lambda: json.dumps(legacy_walk(payload), cls=DjangoJSONEncoder),
+            'json_encoding.dumps': lambda: json_encoding.dumps(payload),
+            'json_encoding.to_primitive': lambda: json_encoding.to_primitive(payload),
+        }
+        backend = 'orjson' if json_encoding.orjson else 'stdlib json'
+        self.stdout.write(f'{iterations} iterations, {len(json_encoding.dumps(payload))} byte payload, backend: {backend}')
+
+        baseline = None
+        for label, encode in candidates.items():
+            seconds = min(timeit.repeat(encode, number=iterations, repeat=3))
+            baseline = baseline or seconds
+            per_call = seconds / iterations * 1e6
+            self.stdout.write(f'{label:<28} {per_call:8.2f} us/call  {baseline / seconds:5.1f}x')
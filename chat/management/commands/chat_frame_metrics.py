@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from chat.metrics import frame_metrics, reset_frame_metrics
+
+
+class Command(BaseCommand):
+    help = 'Report outbound chat WebSocket frame counts and sizes per event type and wire format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after reporting')
+
+    def handle(self, *args, **options):
+        metrics = frame_metrics()
+        if not metrics:
+            self.stdout.write('No frame metrics recorded')
+        else:
+            self.stdout.write(f"{'event type':<20} {'format':<24} {'frames':>10} {'bytes':>14} {'avg':>8} {'over budget':>12}")
+            for (event_type, wire_format), counts in sorted(metrics.items(), key=lambda item: -item[1]['bytes']):
+                self.stdout.write(
+                    f"{event_type:<20} {wire_format:<24} {counts['frames']:>10} {counts['bytes']:>14} "
+                    f"{counts['avg_bytes']:>8} {counts['over_budget']:>12}"
+                )
+
+        if options['reset']:
+            reset_frame_metrics()
+            self.stdout.write(self.style.SUCCESS('Frame metrics reset'))
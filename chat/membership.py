@@ -0,0 +1,202 @@
+"""
+Conversation membership cache.
+
+Every chat request and WebSocket connect checks that the user takes part in
+the conversation, and most also that they haven't deleted it. Each user's
+answer set lives in one Redis set, "chat:member_conversations:<acc_id>":
+
+- "m:<conversation_id>" for every conversation the user participates in
+- "h:<conversation_id>" for those the user deleted (ConversationDeletion)
+- a "" member marking the set as loaded, since Redis drops empty sets
+
+so a check is a single round trip of SISMEMBER calls. A missing set is
+loaded from the database on first use and expires after
+CHAT_MEMBERSHIP_CACHE_TTL. Participant adds, removes and clears,
+ConversationDeletion saves and deletes, and conversation deletes drop the
+affected users' sets once the transaction commits, and the next check
+reloads them.
+
+Invalidation also bumps a per-user generation counter. A load reads the
+counter before querying the database and writes the set only if the counter
+is unchanged, checked in the same Lua script, so a load that overlaps a
+committed change never stores the membership from before it.
+
+When Redis is unavailable the checks query the database directly.
+"""
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from utils.redis_client import get_redis
+from .models import Conversation, ConversationDeletion
+
+logger = logging.getLogger(__name__)
+
+LOADED = ''
+MEMBER_PREFIX = 'm:'
+HIDDEN_PREFIX = 'h:'
+
+# Writes the set (ARGV[3:]) only while the generation still reads ARGV[1]
+STORE_SCRIPT = """
+local generation = redis.call('GET', KEYS[2]) or ''
+if generation ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 1000 do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+GENERATION_TTL = 24 * 60 * 60
+
+_store_script = None
+
+
+def membership_key(acc_id):
+    return f"chat:member_conversations:{acc_id}"
+
+
+def generation_key(acc_id):
+    return f"chat:member_generation:{acc_id}"
+
+
+def store_script(client):
+    global _store_script
+    if _store_script is None:
+        _store_script = client.register_script(STORE_SCRIPT)
+    return _store_script
+
+
+def database_membership(user):
+    """(participant conversation ids, deleted conversation ids) as strings"""
+    member_ids = Conversation.objects.filter(participants=user).values_list('conversation_id', flat=True)
+    hidden_ids = ConversationDeletion.objects.filter(user=user).values_list('conversation_id', flat=True)
+    return {str(cid) for cid in member_ids}, {str(cid) for cid in hidden_ids}
+
+
+def load_membership(client, user):
+    generation = client.get(generation_key(user.pk)) or b''
+    member_ids, hidden_ids = database_membership(user)
+    store_script(client)(
+        keys=[membership_key(user.pk), generation_key(user.pk)],
+        args=[
+            generation, settings.CHAT_MEMBERSHIP_CACHE_TTL, LOADED,
+            *(MEMBER_PREFIX + cid for cid in member_ids),
+            *(HIDDEN_PREFIX + cid for cid in hidden_ids),
+        ],
+        client=client,
+    )
+    return member_ids, hidden_ids
+
+
+def membership(user, conversation_id):
+    """(is_participant, has_deleted) for the user and conversation"""
+    cid = str(conversation_id)
+    try:
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        key = membership_key(user.pk)
+        pipe.sismember(key, LOADED)
+        pipe.sismember(key, MEMBER_PREFIX + cid)
+        pipe.sismember(key, HIDDEN_PREFIX + cid)
+        loaded, is_member, is_hidden = pipe.execute()
+        if loaded:
+            return bool(is_member), bool(is_hidden)
+        member_ids, hidden_ids = load_membership(client, user)
+    except Exception as e:
+        logger.warning(f"Membership cache unavailable: {str(e)}")
+        return (
+            Conversation.objects.filter(conversation_id=cid, participants=user).exists(),
+            ConversationDeletion.objects.filter(conversation_id=cid, user=user).exists(),
+        )
+    return cid in member_ids, cid in hidden_ids
+
+
+def is_participant(user, conversation_id):
+    return membership(user, conversation_id)[0]
+
+
+def can_access(user, conversation_id):
+    """Participant in the conversation and hasn't deleted it"""
+    is_member, is_hidden = membership(user, conversation_id)
+    return is_member and not is_hidden
+
+
+def active_conversation_ids(user):
+    """Ids of the conversations the user participates in and hasn't deleted"""
+    try:
+        client = get_redis()
+        entries = client.smembers(membership_key(user.pk))
+        if LOADED.encode() not in entries:
+            member_ids, hidden_ids = load_membership(client, user)
+            return member_ids - hidden_ids
+    except Exception as e:
+        logger.warning(f"Membership cache unavailable: {str(e)}")
+        member_ids, hidden_ids = database_membership(user)
+        return member_ids - hidden_ids
+
+    entries = {entry.decode() for entry in entries}
+    return {
+        entry[len(MEMBER_PREFIX):] for entry in entries
+        if entry.startswith(MEMBER_PREFIX) and HIDDEN_PREFIX + entry[len(MEMBER_PREFIX):] not in entries
+    }
+
+
+def get_participant_conversation(user, conversation_id, include_deleted=True):
+    """The conversation, or Http404 unless the user participates in it (and, if not include_deleted, hasn't deleted it)"""
+    is_member, is_hidden = membership(user, conversation_id)
+    if not is_member or (is_hidden and not include_deleted):
+        raise Http404('No Conversation matches the given query.')
+    return get_object_or_404(Conversation, conversation_id=conversation_id)
+
+
+def invalidate_membership(acc_ids):
+    """Drop the users' cached sets and bump their generations once the current transaction commits"""
+    acc_ids = set(acc_ids)
+    if not acc_ids:
+        return
+
+    def delete_keys():
+        try:
+            pipe = get_redis().pipeline()
+            for acc_id in acc_ids:
+                pipe.incr(generation_key(acc_id))
+                # Outlives any load in progress; a missing counter reads as a new generation
+                pipe.expire(generation_key(acc_id), GENERATION_TTL)
+                pipe.delete(membership_key(acc_id))
+            pipe.execute()
+        except Exception as e:
+            # Sets not dropped here expire after CHAT_MEMBERSHIP_CACHE_TTL
+            logger.warning(f"Membership cache invalidation failed: {str(e)}")
+
+    transaction.on_commit(delete_keys)
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        invalidate_membership([instance.pk] if reverse else pk_set or [])
+    elif action == 'pre_clear':
+        # The cleared rows are gone by post_clear
+        if reverse:
+            invalidate_membership([instance.pk])
+        else:
+            invalidate_membership(instance.participants.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=ConversationDeletion)
+@receiver(post_delete, sender=ConversationDeletion)
+def conversation_deletion_changed(sender, instance, **kwargs):
+    invalidate_membership([instance.user_id])
+
+
+@receiver(pre_delete, sender=Conversation)
+def conversation_deleted(sender, instance, **kwargs):
+    # The participant rows cascade without m2m_changed
+    invalidate_membership(instance.participants.values_list('pk', flat=True))
@@ -0,0 +1,74 @@
+"""
+Outbound WebSocket frame size metrics.
+
+Each consumer process counts frames, bytes and frames over
+CHAT_FRAME_SIZE_BUDGET per (event type, wire format) in memory, and adds the
+counts to a Redis hash about every CHAT_FRAME_METRICS_FLUSH_SECONDS, so
+recording a frame never waits on Redis. `manage.py chat_frame_metrics`
+reports the totals.
+"""
+import logging
+import time
+import threading
+from collections import defaultdict
+from django.conf import settings
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+FRAME_METRICS_KEY = 'chat:frame_metrics'
+COUNTERS = ('frames', 'bytes', 'over_budget')
+
+# "<event type>:<wire format>" -> [frames, bytes, over_budget] not yet flushed
+_pending = defaultdict(lambda: [0, 0, 0])
+_last_flush = time.monotonic()
+# record_frame runs on the event loop and flush_frame_metrics in a worker thread
+_lock = threading.Lock()
+
+
+def record_frame(event_type, wire_format, size):
+    """Count one sent frame. Returns True when the pending counts are due to be flushed."""
+    with _lock:
+        counts = _pending[f"{event_type}:{wire_format}"]
+        counts[0] += 1
+        counts[1] += size
+        if size > settings.CHAT_FRAME_SIZE_BUDGET:
+            counts[2] += 1
+    return time.monotonic() - _last_flush >= settings.CHAT_FRAME_METRICS_FLUSH_SECONDS
+
+
+def flush_frame_metrics():
+    global _pending, _last_flush
+    with _lock:
+        pending, _pending = _pending, defaultdict(lambda: [0, 0, 0])
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key, counts in pending.items():
+            for counter, value in zip(COUNTERS, counts):
+                if value:
+                    pipe.hincrby(FRAME_METRICS_KEY, f"{key}:{counter}", value)
+        pipe.execute()
+    except Exception as e:
+        # Keep the counts for the next flush
+        logger.warning(f"Frame metrics flush failed: {str(e)}")
+        with _lock:
+            for key, counts in pending.items():
+                _pending[key] = [total + value for total, value in zip(_pending[key], counts)]
+
+
+def frame_metrics():
+    """{(event_type, wire_format): {'frames', 'bytes', 'over_budget', 'avg_bytes'}}"""
+    metrics = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for field, value in get_redis().hgetall(FRAME_METRICS_KEY).items():
+        event_type, wire_format, counter = field.decode().rsplit(':', 2)
+        metrics[(event_type, wire_format)][counter] = int(value)
+    for counts in metrics.values():
+        counts['avg_bytes'] = round(counts['bytes'] / counts['frames']) if counts['frames'] else 0
+    return dict(metrics)
+
+
+def reset_frame_metrics():
+    get_redis().delete(FRAME_METRICS_KEY)
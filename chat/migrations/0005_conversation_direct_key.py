@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:40
+
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def backfill_direct_keys(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    Participant = Conversation.participants.through
+
+    participants = defaultdict(set)
+    rows = Participant.objects.filter(conversation__is_group=False).order_by(
+        'conversation__created_at'
+    ).values_list('conversation_id', 'account_id')
+    for conversation_id, account_id in rows:
+        participants[conversation_id].add(account_id)
+
+    # Duplicate direct conversations keep their history; the oldest one takes the key
+    keyed, taken = [], set()
+    for conversation_id, account_ids in participants.items():
+        if len(account_ids) != 2:
+            continue
+        direct_key = ':'.join(sorted(account_ids))
+        if direct_key not in taken:
+            taken.add(direct_key)
+            keyed.append(Conversation(conversation_id=conversation_id, direct_key=direct_key))
+    Conversation.objects.bulk_update(keyed, ['direct_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_attachmentupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_key',
+            field=models.CharField(blank=True, editable=False, max_length=129, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_direct_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_conversation_direct_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attachmentupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('complete', 'Complete')], default='pending', max_length=10),
+        ),
+    ]
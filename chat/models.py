@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from cryptography.fernet import Fernet
 from django.conf import settings
+import os
 import json
 import uuid
 from django.core.validators import FileExtensionValidator
@@ -20,10 +21,43 @@ class Conversation(models.Model):
     
     encryption_key = models.TextField(blank=True, null=True)
 
+    # "<acc_id>:<acc_id>" of the two participants, in order; set on 1:1 conversations only
+    direct_key = models.CharField(max_length=129, unique=True, null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ['-updated_at']
         db_table = 'conversations'
 
+    @staticmethod
+    def direct_key_for(acc_id, other_acc_id):
+        return ':'.join(sorted((acc_id, other_acc_id)))
+
+    @classmethod
+    def get_or_create_direct(cls, user, other_user):
+        """
+        The 1:1 conversation between two accounts, found through the unique
+        direct_key and created with both participants if missing. Opening a
+        conversation the user had deleted restores it for them.
+        """
+        direct_key = cls.direct_key_for(user.acc_id, other_user.acc_id)
+        conversation = cls.objects.filter(direct_key=direct_key).first()
+
+        if conversation is None:
+            try:
+                # The participants commit together with the conversation
+                with transaction.atomic():
+                    conversation = cls.objects.create(is_group=False, created_by=user, direct_key=direct_key)
+                    conversation.participants.add(user, other_user)
+                return conversation
+            except IntegrityError:
+                # A concurrent request created it first; any other integrity error is re-raised
+                conversation = cls.objects.filter(direct_key=direct_key).first()
+                if conversation is None:
+                    raise
+
+        ConversationDeletion.objects.filter(conversation=conversation, user=user).delete()
+        return conversation
+
     def save(self, *args, **kwargs):
         if not self.encryption_key:
             self.encryption_key = Fernet.generate_key().decode()
@@ -192,4 +226,51 @@ class ConversationDeletion(models.Model):
 
     class Meta:
         unique_together = ['conversation', 'user']
-        db_table = 'conversation_deletions'
\ No newline at end of file
+        db_table = 'conversation_deletions'
+
+
+class AttachmentUpload(models.Model):
+    """A chunked, resumable attachment upload that is assembled on local disk."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('complete', 'Complete'),
+    ]
+
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='attachment_uploads')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attachment_uploads')
+    file_name = models.CharField(max_length=255)
+    file_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    received_chunks = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'attachment_uploads'
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received_chunks}/{self.total_chunks})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.file_size // self.chunk_size))
+
+    @property
+    def is_assembled(self):
+        return self.received_chunks >= self.total_chunks
+
+    @property
+    def temp_path(self):
+        return os.path.join(str(settings.CHUNKED_UPLOAD_ROOT), f"{self.upload_id}.part")
+
+    def expected_chunk_length(self, index):
+        return min(self.chunk_size, self.file_size - index * self.chunk_size)
+
+    def discard_temp_file(self):
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
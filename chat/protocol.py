@@ -0,0 +1,110 @@
+"""
+WebSocket wire formats for chat.
+
+Clients get JSON text frames by default. At connect a client may offer a
+subprotocol of the form "petropal.<json|msgpack>[+delta][+deflate]"; the
+first offered one that parses is accepted and echoed back:
+
+- msgpack: binary msgpack frames instead of JSON text, same event schema.
+- delta: user objects inside events are replaced by their acc_id, and a
+  {"type": "profiles", "profiles": {acc_id: user}} frame is sent first
+  whenever an event references a user this connection hasn't been sent yet,
+  or whose snapshot changed.
+- deflate: every outgoing frame is raw-deflate compressed (RFC 1951, no
+  shared context between frames) and sent as binary. Incoming frames are
+  never compressed.
+
+Compression is done here rather than with permessage-deflate because the
+extension is negotiated by the ASGI server, not by the application.
+
+Broadcast frames arrive from the channel layer already encoded as JSON
+(chat.broadcast). Converting one to a connection's format is memoized per
+process, so a message fanned out to many clients on one server is converted
+once per format.
+"""
+from functools import lru_cache
+import zlib
+import msgpack
+from utils.json_encoding import dumps, loads, to_primitive
+
+SUBPROTOCOL_PREFIX = 'petropal.'
+FORMATS = ('json', 'msgpack')
+OPTIONS = ('delta', 'deflate')
+
+# Recent broadcast frames kept in each converted form
+FRAME_CACHE_SIZE = 256
+COMPRESSION_LEVEL = 6
+
+
+class WireFormat:
+    """Frame encoding negotiated for one connection"""
+
+    def __init__(self, binary=False, delta=False, deflate=False):
+        self.binary = binary
+        self.delta = delta
+        self.deflate = deflate
+
+    @property
+    def name(self):
+        options = [option for option in OPTIONS if getattr(self, option)]
+        return '+'.join(['msgpack' if self.binary else 'json', *options])
+
+    def encode(self, frame):
+        """Encode a frame built for this connection only. Returns str for text frames, bytes otherwise."""
+        if self.binary:
+            return finish(msgpack.packb(to_primitive(frame), use_bin_type=True), self.deflate)
+        text = dumps(frame)
+        return deflate(text.encode()) if self.deflate else text
+
+    def encode_text(self, text, cached=True):
+        """Encode a pre-encoded JSON frame, as broadcast through the channel layer"""
+        if not self.binary and not self.deflate:
+            return text
+        convert = convert_json_frame if cached else convert_json_frame.__wrapped__
+        return convert(text, self.binary, self.deflate)
+
+
+def parse_subprotocol(subprotocol):
+    if not subprotocol.startswith(SUBPROTOCOL_PREFIX):
+        return None
+    frame_format, *options = subprotocol[len(SUBPROTOCOL_PREFIX):].split('+')
+    if frame_format not in FORMATS or len(set(options)) != len(options) or not set(options) <= set(OPTIONS):
+        return None
+    return WireFormat(binary=frame_format == 'msgpack', delta='delta' in options, deflate='deflate' in options)
+
+
+def negotiate_subprotocol(requested):
+    """(subprotocol to accept or None, WireFormat) for the client's offered subprotocols"""
+    for subprotocol in requested or []:
+        wire_format = parse_subprotocol(subprotocol)
+        if wire_format is not None:
+            return subprotocol, wire_format
+    return None, WireFormat()
+
+
+def deflate(data):
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def finish(data, compress):
+    return deflate(data) if compress else data
+
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def convert_json_frame(text, binary, compress):
+    data = msgpack.packb(loads(text), use_bin_type=True) if binary else text.encode()
+    return finish(data, compress)
+
+
+def decode_frame(text_data=None, bytes_data=None):
+    """
+    Parse an incoming frame: text is JSON, binary is msgpack.
+    Raises ValueError (including JSON and msgpack decode errors) on malformed input.
+    """
+    if bytes_data is not None:
+        try:
+            return msgpack.unpackb(bytes_data, raw=False)
+        except msgpack.UnpackException as e:
+            raise ValueError(str(e)) from e
+    return loads(text_data)
@@ -0,0 +1,50 @@
+"""
+Compact reaction summaries.
+
+Messages carry reaction counts per type and the types the viewer reacted
+with, instead of every reaction with its user. A list page computes them for
+all its messages with one grouped query; a single message costs one query.
+Who reacted is served separately, a page at a time, by the message reactions
+endpoint.
+"""
+from django.db.models import Count, Q
+from chat.models import MessageReaction
+
+
+def reaction_summaries(message_ids, user):
+    """{message_id: {'counts': {reaction: n}, 'mine': [reaction, ...]}}"""
+    summaries = {message_id: {'counts': {}, 'mine': []} for message_id in message_ids}
+    rows = MessageReaction.objects.filter(message__in=message_ids).values('message', 'reaction').annotate(
+        count=Count('id'),
+        mine=Count('id', filter=Q(user_id=getattr(user, 'pk', None))),
+    ).order_by('message', 'reaction')
+    for row in rows:
+        summary = summaries[row['message']]
+        summary['counts'][row['reaction']] = row['count']
+        if row['mine']:
+            summary['mine'].append(row['reaction'])
+    return summaries
+
+
+def attach_reaction_summaries(messages, user):
+    summaries = reaction_summaries([message.pk for message in messages], user)
+    for message in messages:
+        message.reaction_summary = summaries[message.pk]
+    return messages
+
+
+def get_reaction_summary(message, user):
+    summary = getattr(message, 'reaction_summary', None)
+    if summary is None:
+        summary = message.reaction_summary = reaction_summaries([message.pk], user)[message.pk]
+    return summary
+
+
+class ReactionSummaryMixin:
+    """List view mixin attaching reaction summaries to the page before it is serialized"""
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many'):
+            messages = attach_reaction_summaries(list(args[0]), self.request.user)
+            args = (messages, *args[1:])
+        return super().get_serializer(*args, **kwargs)
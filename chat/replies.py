@@ -0,0 +1,96 @@
+"""
+Reply previews for message pages.
+
+A reply shows a short preview of the message it answers. A list page loads
+every referenced parent in one query, with the sender's profile and status
+and whether the viewer deleted it. Contents are decrypted with one cipher per
+conversation key, and each sender is serialized once for the whole page.
+"""
+from cryptography.fernet import Fernet
+from django.db.models import Exists, OuterRef
+from chat.models import Message, MessageDeletion
+from utils.file_processor import FileProcessor
+
+PREVIEW_LENGTH = 100
+
+
+def decrypt_contents(messages):
+    """{message pk: decrypted content}, same fallbacks as Conversation.decrypt_message"""
+    ciphers = {}
+    contents = {}
+    for message in messages:
+        key = message.conversation.encryption_key
+        content = message.content
+        if key and content:
+            try:
+                cipher = ciphers.get(key) or ciphers.setdefault(key, Fernet(key.encode()))
+                content = cipher.decrypt(content.encode()).decode()
+            except Exception:
+                pass
+        contents[message.pk] = content
+    return contents
+
+
+def reply_previews(parent_ids, user):
+    """{parent message id: preview} for the reply_to field of MessageSerializer"""
+    from chat.serializers import UserDisplaySerializer
+
+    parents = list(Message.objects.filter(pk__in=parent_ids).select_related(
+        'conversation', 'sender__profile', 'sender__status'
+    ).annotate(
+        deleted_by_viewer=Exists(MessageDeletion.objects.filter(
+            message=OuterRef('pk'), user_id=getattr(user, 'pk', None)
+        ))
+    ))
+    contents = decrypt_contents(parent for parent in parents if not parent.deleted_by_viewer)
+
+    senders = {}
+    previews = {}
+    for parent in parents:
+        if parent.sender_id not in senders:
+            senders[parent.sender_id] = UserDisplaySerializer(parent.sender).data
+        sender = senders[parent.sender_id]
+
+        if parent.deleted_by_viewer:
+            previews[parent.pk] = {
+                'message_id': parent.pk,
+                'content': '[Message deleted]',
+                'sender': sender
+            }
+            continue
+
+        previews[parent.pk] = {
+            'message_id': parent.pk,
+            'content': (contents[parent.pk] or '')[:PREVIEW_LENGTH],
+            'attachment_type': FileProcessor.get_file_type(parent.file_name) if parent.file_name else None,
+            'attachment': parent.attachment.url if parent.attachment else None,
+            'sender': sender,
+            'message_type': parent.message_type
+        }
+    return previews
+
+
+def attach_reply_previews(messages, user):
+    parent_ids = {message.reply_to_id for message in messages if message.reply_to_id}
+    previews = reply_previews(parent_ids, user) if parent_ids else {}
+    for message in messages:
+        message.reply_preview = previews.get(message.reply_to_id)
+    return messages
+
+
+def get_reply_preview(message, user):
+    if not message.reply_to_id:
+        return None
+    if not hasattr(message, 'reply_preview'):
+        message.reply_preview = reply_previews([message.reply_to_id], user).get(message.reply_to_id)
+    return message.reply_preview
+
+
+class ReplyPreviewMixin:
+    """List view mixin loading the reply previews of a page before it is serialized"""
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many'):
+            messages = attach_reply_previews(list(args[0]), self.request.user)
+            args = (messages, *args[1:])
+        return super().get_serializer(*args, **kwargs)
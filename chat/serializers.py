@@ -1,11 +1,14 @@
 from rest_framework import serializers
 from chat.models import (
     Conversation, Message, MessageReadStatus, MessageReaction, 
-    UserStatus, MessageDeletion, ConversationDeletion
+    UserStatus, MessageDeletion, ConversationDeletion, AttachmentUpload
 )
+from django.conf import settings
 from accounts.models import Account
 from django.utils import timezone
 from utils.file_processor import FileProcessor
+from chat.reactions import get_reaction_summary
+from chat.replies import get_reply_preview
 from django.core.exceptions import ValidationError
 
 class UserDisplaySerializer(serializers.ModelSerializer):
@@ -47,8 +50,9 @@ class MessageReactionSerializer(serializers.ModelSerializer):
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserDisplaySerializer(read_only=True)
     content = serializers.SerializerMethodField()
-    reactions = MessageReactionSerializer(many=True, read_only=True)
+    # Compact reactions; who reacted is listed by the message reactions endpoint
     reaction_counts = serializers.SerializerMethodField()
+    my_reactions = serializers.SerializerMethodField()
     reply_to = serializers.SerializerMethodField()
     is_deleted_by_me = serializers.SerializerMethodField()
     
@@ -67,13 +71,21 @@ class MessageSerializer(serializers.ModelSerializer):
             'attachment', 'attachment_type', 'file_name', 
             'file_size', 'file_mime_type', 'is_compressed', 
             'sender', 'is_edited', 'edited_at',
-            'reactions', 'reaction_counts', 'reply_to', 'is_deleted_by_me'
+            'reaction_counts', 'my_reactions', 'reply_to', 'is_deleted_by_me'
         ]
         read_only_fields = [
             'message_id', 'timestamp', 'sender', 'is_edited', 'edited_at',
             'file_size', 'file_mime_type', 'is_compressed', 'video_duration'
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('broadcast'):
+            # One frame goes to every member, so viewer-specific reactions stay
+            # out; clients track their own from the reaction events
+            fields.pop('my_reactions')
+        return fields
+
     def to_representation(self, instance):
         rep = super().to_representation(instance)
         hidden_fields = ['file_name', 'file_size', 'file_mime_type', 'attachment_type', 'is_compressed']
@@ -102,7 +114,9 @@ class MessageSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         message_type = attrs.get("message_type", "text")
         content = attrs.get("message_content") or attrs.get("content")
-        attachment = self.context['request'].FILES.get('attachment') if self.context.get('request') else None
+        attachment = self.context.get('attachment')
+        if attachment is None and self.context.get('request'):
+            attachment = self.context['request'].FILES.get('attachment')
 
         if message_type == "text":
             if not content or not str(content).strip():
@@ -124,8 +138,9 @@ class MessageSerializer(serializers.ModelSerializer):
             
             try:
                 FileProcessor.validate_file_size(attachment, message_type)
+                attrs["file_mime_type"] = FileProcessor.validate_file_signature(attachment)
             except ValidationError as e:
-                raise serializers.ValidationError({"attachment": str(e)})
+                raise serializers.ValidationError({"attachment": e.messages[0]})
             
             attrs["content"] = content or ""
 
@@ -142,34 +157,18 @@ class MessageSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
+    def get_viewer(self):
+        request = self.context.get('request')
+        return request.user if request else None
+
     def get_reaction_counts(self, obj):
-        reactions = obj.reactions.all()
-        counts = {}
-        for reaction in reactions:
-            reaction_type = reaction.reaction
-            counts[reaction_type] = counts.get(reaction_type, 0) + 1
-        return counts
+        return get_reaction_summary(obj, self.get_viewer())['counts']
 
-    def get_reply_to(self, obj):
-        if obj.reply_to:
-            request = self.context.get('request')
-            if request and request.user:
-                if MessageDeletion.objects.filter(message=obj.reply_to, user=request.user).exists():
-                    return {
-                        'message_id': obj.reply_to.message_id,
-                        'content': '[Message deleted]',
-                        'sender': UserDisplaySerializer(obj.reply_to.sender).data
-                    }
+    def get_my_reactions(self, obj):
+        return get_reaction_summary(obj, self.get_viewer())['mine']
 
-            return {
-                'message_id': obj.reply_to.message_id,
-                'content': obj.reply_to.get_decrypted_content()[:100],
-                'attachment_type': self.get_attachment_type(obj.reply_to),
-                'attachment': obj.reply_to.attachment.url if obj.reply_to.attachment else None,
-                'sender': UserDisplaySerializer(obj.reply_to.sender).data,
-                'message_type': obj.reply_to.message_type
-            }
-        return None
+    def get_reply_to(self, obj):
+        return get_reply_preview(obj, self.get_viewer())
 class ConversationSerializer(serializers.ModelSerializer):
     participants = UserDisplaySerializer(many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
@@ -239,8 +238,25 @@ class ConversationCreateSerializer(serializers.ModelSerializer):
         model = Conversation
         fields = ['name', 'is_group', 'participant_ids']
 
+    def validate(self, attrs):
+        if not attrs.get('is_group', False):
+            # Direct conversations are unique per pair, see Conversation.get_or_create_direct
+            others = Account.objects.filter(acc_id__in=attrs['participant_ids']).exclude(
+                acc_id=self.context['request'].user.acc_id
+            )
+            if len(others) != 1:
+                raise serializers.ValidationError({
+                    "participant_ids": "Direct conversations need exactly one other participant."
+                })
+            attrs['direct_participant'] = others[0]
+        return attrs
+
     def create(self, validated_data):
         participant_ids = validated_data.pop('participant_ids')
+        other_user = validated_data.pop('direct_participant', None)
+        if other_user is not None:
+            return Conversation.get_or_create_direct(self.context['request'].user, other_user)
+
         conversation = Conversation.objects.create(
             created_by=self.context['request'].user,
             **validated_data
@@ -271,4 +287,45 @@ class MessageEditSerializer(serializers.ModelSerializer):
         return instance
 
     def to_representation(self, instance):
-        return MessageSerializer(instance, context=self.context).data
\ No newline at end of file
+        return MessageSerializer(instance, context=self.context).data
+
+
+# Serializer for starting and tracking chunked attachment uploads
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(required=False, min_value=64 * 1024)
+    total_chunks = serializers.IntegerField(read_only=True)
+    next_chunk = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttachmentUpload
+        fields = [
+            'upload_id', 'file_name', 'file_size', 'chunk_size',
+            'total_chunks', 'received_chunks', 'next_chunk', 'status', 'created_at'
+        ]
+        read_only_fields = ['upload_id', 'received_chunks', 'status', 'created_at']
+
+    def get_next_chunk(self, obj):
+        if obj.is_assembled:
+            return None
+        return obj.received_chunks
+
+    def validate_file_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("File size must be greater than zero.")
+        return value
+
+    def validate_chunk_size(self, value):
+        return min(value, settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE)
+
+    def validate(self, attrs):
+        file_type = FileProcessor.get_file_type(attrs['file_name'])
+        if file_type == 'document':
+            raise serializers.ValidationError({"file_name": "File type is not allowed."})
+
+        try:
+            FileProcessor.validate_size(attrs['file_size'], file_type)
+        except ValidationError as e:
+            raise serializers.ValidationError({"file_size": str(e)})
+
+        attrs.setdefault('chunk_size', settings.CHUNKED_UPLOAD_CHUNK_SIZE)
+        return attrs
@@ -1,13 +1,32 @@
+import os
+import time
+import uuid
+import posixpath
+import queue
+import shutil
+import logging
+import threading
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.utils import validate_file_name
+from django.urls import reverse
 from storages.backends.sftpstorage import SFTPStorage
 
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = '.part'
+CLAIM_SUFFIX = '.claim'
+# Spool entries that are not finished files
+WORK_SUFFIXES = (PART_SUFFIX, CLAIM_SUFFIX)
+
 
 class CPanelSFTPStorage(SFTPStorage):
     """
     Custom SFTP Storage for cPanel hosting.
     Uploads media files to remote server via SFTP.
     """
-    
+
     def __init__(self, **kwargs):
         kwargs['host'] = settings.SFTP_STORAGE_HOST
         kwargs['root_path'] = settings.SFTP_STORAGE_ROOT
@@ -16,13 +35,255 @@ class CPanelSFTPStorage(SFTPStorage):
         kwargs['file_mode'] = settings.SFTP_STORAGE_FILE_MODE
         kwargs['dir_mode'] = settings.SFTP_STORAGE_DIR_MODE
         super().__init__(**kwargs)
-    
+
     def _save(self, name, content):
         name = name.replace('\\', '/')
         return super()._save(name, content)
-    
+
     def url(self, name):
         if name:
             clean_name = name.lstrip('/').replace('\\', '/')
             return f"{settings.MEDIA_URL.rstrip('/')}/{clean_name}"
-        return settings.MEDIA_URL
\ No newline at end of file
+        return settings.MEDIA_URL
+
+
+class SpoolUploader:
+    """
+    Background thread that replicates spooled files to the SFTP host.
+
+    Files stay in the spool until the upload succeeds. The thread starts with
+    the app (ChatConfig.ready) and rescans the spool whenever it has been idle
+    for MEDIA_SPOOL_RESCAN_SECONDS, so files left behind by a crash or
+    restart are picked up without waiting for the next upload. Every process
+    serving the spool runs one; a process replicates a file only after
+    creating its "<file>.claim" with O_EXCL, and holds the claim through its
+    retries. A claim older than MEDIA_SPOOL_CLAIM_TTL is taken to be left by
+    a dead process and is taken over. Files that still fail after
+    MEDIA_SPOOL_MAX_RETRIES are moved to MEDIA_SPOOL_DEAD_LETTER_ROOT.
+    """
+
+    def __init__(self, spool_root):
+        self.spool_root = spool_root
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.remote = None
+        # Names queued or claimed by this process
+        self.pending = set()
+
+    def enqueue(self, name, attempt=0):
+        self.start()
+        with self.lock:
+            if attempt == 0 and name in self.pending:
+                return
+            self.pending.add(name)
+        self.queue.put((name, attempt))
+
+    def start(self):
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self.run, name='media-spool-uploader', daemon=True)
+            self.thread.start()
+
+    def rescan(self):
+        for name in self.pending_files():
+            self.enqueue(name)
+
+    def pending_files(self):
+        for dirpath, _, filenames in os.walk(self.spool_root):
+            for filename in filenames:
+                if filename.endswith(WORK_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, self.spool_root).replace(os.sep, '/')
+
+    def spool_path(self, name):
+        return os.path.join(self.spool_root, *name.split('/'))
+
+    def claim(self, name):
+        """Take the file's claim, or return False while another live process holds it"""
+        claim_path = self.spool_path(name) + CLAIM_SUFFIX
+        for _ in range(2):
+            try:
+                fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(claim_path) < settings.MEDIA_SPOOL_CLAIM_TTL:
+                        return False
+                    os.remove(claim_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            except FileNotFoundError:
+                # Replicated and removed by another process
+                return False
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def release(self, name):
+        try:
+            os.remove(self.spool_path(name) + CLAIM_SUFFIX)
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            self.pending.discard(name)
+
+    def run(self):
+        # paramiko clients are not thread safe, so the uploader owns its own connection
+        self.remote = CPanelSFTPStorage()
+        self.rescan()
+        while True:
+            try:
+                name, attempt = self.queue.get(timeout=settings.MEDIA_SPOOL_RESCAN_SECONDS)
+            except queue.Empty:
+                self.rescan()
+                continue
+            try:
+                if attempt == 0 and not self.claim(name):
+                    with self.lock:
+                        self.pending.discard(name)
+                    continue
+                self.upload(name)
+                self.release(name)
+            except Exception as e:
+                self.retry(name, attempt, e)
+            finally:
+                self.queue.task_done()
+
+    def upload(self, name):
+        path = self.spool_path(name)
+        if not os.path.exists(path):
+            # deleted before replication finished
+            return
+        # Keeps the claim fresh across slow retries
+        os.utime(path + CLAIM_SUFFIX)
+        with open(path, 'rb') as f:
+            self.remote._save(name, f)
+        os.remove(path)
+        logger.info(f"Replicated spooled media file {name}")
+
+    def retry(self, name, attempt, error):
+        attempt += 1
+        if attempt > settings.MEDIA_SPOOL_MAX_RETRIES:
+            self.dead_letter(name, attempt, error)
+            return
+        delay = settings.MEDIA_SPOOL_RETRY_DELAY * (2 ** (attempt - 1))
+        logger.warning(f"Replicating {name} failed ({error}), retrying in {delay}s")
+        timer = threading.Timer(delay, self.queue.put, args=((name, attempt),))
+        timer.daemon = True
+        timer.start()
+
+    def dead_letter(self, name, attempt, error):
+        target = os.path.join(str(settings.MEDIA_SPOOL_DEAD_LETTER_ROOT), *name.split('/'))
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(self.spool_path(name), target)
+            logger.error(f"Giving up replicating {name} after {attempt} attempts, moved to {target}: {error}")
+        except Exception as e:
+            logger.error(f"Giving up replicating {name} after {attempt} attempts: {error}; "
+                         f"could not move it to the dead-letter directory: {str(e)}")
+        self.release(name)
+
+
+def start_spool_uploader():
+    """Start replicating whatever is left in the spool, if the default storage spools"""
+    from django.core.files.storage import default_storage
+    spool_root = getattr(default_storage, 'spool_root', None)
+    if spool_root:
+        default_storage.uploader.start()
+
+
+_uploaders = {}
+_uploaders_lock = threading.Lock()
+
+
+def get_spool_uploader(spool_root):
+    with _uploaders_lock:
+        if spool_root not in _uploaders:
+            _uploaders[spool_root] = SpoolUploader(spool_root)
+        return _uploaders[spool_root]
+
+
+class WriteBehindSFTPStorage(CPanelSFTPStorage):
+    """
+    SFTP storage with a local write-behind tier.
+    Saves land in MEDIA_SPOOL_ROOT and return immediately; a background
+    uploader replicates them to the cPanel host. Until that finishes the
+    file is read from the local spool.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.spool_root = str(settings.MEDIA_SPOOL_ROOT)
+        self.uploader = get_spool_uploader(self.spool_root)
+
+    def spool_path(self, name):
+        return os.path.join(self.spool_root, *name.lstrip('/').split('/'))
+
+    def is_spooled(self, name):
+        return os.path.exists(self.spool_path(name))
+
+    def _save(self, name, content):
+        name = name.replace('\\', '/')
+        path = self.spool_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        temp_path = path + PART_SUFFIX
+        with open(temp_path, 'wb') as f:
+            for chunk in content.chunks():
+                f.write(chunk)
+        os.replace(temp_path, path)
+
+        self.uploader.enqueue(name)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # A random prefix keeps new names unique without the remote stat
+        # that exists() would need for every save
+        name = validate_file_name(name.replace('\\', '/'), allow_relative_path=True)
+        dir_name, file_name = posixpath.split(name)
+        file_root, file_ext = posixpath.splitext(file_name)
+        prefix = f"{uuid.uuid4().hex[:12]}_"
+        if max_length is not None:
+            overflow = len(posixpath.join(dir_name, prefix + file_name)) - max_length
+            if overflow > 0:
+                file_root = file_root[:-overflow]
+                if not file_root:
+                    raise SuspiciousFileOperation(
+                        f'Storage can not find an available filename for "{name}". '
+                        'Please make sure that the corresponding file field '
+                        'allows sufficient "max_length".'
+                    )
+        return posixpath.join(dir_name, f"{prefix}{file_root}{file_ext}")
+
+    def _open(self, name, mode='rb'):
+        if self.is_spooled(name):
+            return File(open(self.spool_path(name), mode), name)
+        return super()._open(name, mode)
+
+    def exists(self, name):
+        return self.is_spooled(name) or super().exists(name)
+
+    def size(self, name):
+        if self.is_spooled(name):
+            return os.path.getsize(self.spool_path(name))
+        return super().size(name)
+
+    def delete(self, name):
+        if self.is_spooled(name):
+            try:
+                os.remove(self.spool_path(name))
+            except FileNotFoundError:
+                pass
+        super().delete(name)
+
+    def url(self, name):
+        if name and self.is_spooled(name):
+            clean_name = name.lstrip('/').replace('\\', '/')
+            return reverse('spooled-media', kwargs={'name': clean_name})
+        return super().url(name)
@@ -0,0 +1,21 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+
+
+@shared_task
+def cleanup_stale_uploads():
+    from .models import AttachmentUpload
+
+    # Drop finished uploads and pending ones that have not received a chunk in a while
+    cutoff = timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    stale_uploads = AttachmentUpload.objects.filter(updated_at__lt=cutoff)
+
+    upload_count = 0
+    for upload in stale_uploads.iterator():
+        upload.discard_temp_file()
+        upload_count += 1
+    stale_uploads.delete()
+
+    return f'Cleaned up {upload_count} stale attachment uploads'
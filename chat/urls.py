@@ -16,6 +16,12 @@ urlpatterns = [
     path('conversations/<uuid:conversation_id>/mark-read/', views.mark_messages_read, name='mark-messages-read'),
     path('conversations/<uuid:conversation_id>/typing/', views.set_typing_status, name='set-typing-status'),
     
+    # Chunked attachment uploads
+    path('conversations/<uuid:conversation_id>/uploads/', views.init_chunked_upload, name='init-chunked-upload'),
+    path('uploads/<uuid:upload_id>/', views.chunked_upload_status, name='chunked-upload-status'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_chunked_upload, name='complete-chunked-upload'),
+    
     # Message editing, deletion and restoration
     path('messages/<uuid:message_id>/', views.MessageDetailView.as_view(), name='message-detail'),
     path('messages/<uuid:message_id>/delete/', views.delete_message, name='delete-message'),
@@ -23,7 +29,11 @@ urlpatterns = [
     
     # Reactions
     path('messages/<uuid:message_id>/react/', views.add_reaction, name='add-reaction'),
+    path('messages/<uuid:message_id>/reactions/', views.MessageReactionListView.as_view(), name='message-reactions'),
     
     # User status
     path('status/', views.update_user_status, name='update-user-status'),
+
+    # Media still pending replication to the SFTP host
+    path('media/<path:name>', views.serve_spooled_media, name='spooled-media'),
 ]
\ No newline at end of file
@@ -1,46 +1,109 @@
-from rest_framework import generics, status, permissions
+from rest_framework import generics, status, permissions, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q, Max, Prefetch
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
+from django.utils._os import safe_join
+from django.http import FileResponse, Http404
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
 from chat.models import (
     Conversation, Message, MessageReaction, UserStatus, 
-    MessageReadStatus, MessageDeletion, ConversationDeletion
+    MessageReadStatus, MessageDeletion, ConversationDeletion, AttachmentUpload
 )
+from chat.broadcast import send_to_conversation, send_to_conversations
+from chat.membership import (
+    active_conversation_ids, get_participant_conversation, is_participant
+)
+from chat.reactions import ReactionSummaryMixin
+from chat.replies import ReplyPreviewMixin
+from chat.storage_backends import WORK_SUFFIXES
 from chat.serializers import (
     ConversationSerializer, 
     ConversationCreateSerializer, 
     MessageSerializer,
     MessageReactionSerializer,
     UserDisplaySerializer,
-    MessageEditSerializer
+    MessageEditSerializer,
+    AttachmentUploadSerializer
 )
 from accounts.models import Account
-from datetime import datetime, date
 
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+import os
 import mimetypes
+from django.conf import settings
 from utils.file_processor import FileProcessor
-from uuid import UUID
-from decimal import Decimal
-
-def serialize_datetime_objects(obj):
-    if isinstance(obj, dict):
-        return {key: serialize_datetime_objects(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [serialize_datetime_objects(item) for item in obj]
-    elif isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    elif isinstance(obj, UUID):
-        return str(obj)
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif hasattr(obj, 'isoformat'):  
-        return obj.isoformat()
+
+
+def create_message(request, serializer, conversation, attachment=None):
+    """Process the attachment, save the message and broadcast it to the conversation"""
+    reply_to = None
+    if 'reply_to' in request.data:
+        reply_to = get_object_or_404(Message, message_id=request.data['reply_to'])
+
+    original_file_size = 0
+    is_compressed = False
+    video_thumbnail = None
+    video_duration = None
+    file_name = ''
+    file_mime_type = ''
+    
+    if attachment:
+        file_type = FileProcessor.get_file_type(attachment.name)
+        message_type = file_type
+        original_file_size = attachment.size
+        file_name = attachment.name
+
+        # Sniffed from the header bytes during validation; check here too so
+        # mislabelled files never reach the compressors
+        file_mime_type = serializer.validated_data.get('file_mime_type')
+        if not file_mime_type:
+            try:
+                file_mime_type = FileProcessor.validate_file_signature(attachment)
+            except ValidationError as e:
+                raise serializers.ValidationError({'attachment': e.messages[0]})
+        
+        if file_type == 'image':
+            attachment, is_compressed = FileProcessor.compress_image(attachment)
+        
+        elif file_type == 'video':
+            # video_thumbnail = FileProcessor.generate_video_thumbnail(attachment)
+            attachment, is_compressed = FileProcessor.compress_video(attachment)
+            
     else:
-        return obj
+        message_type = request.data.get('message_type', 'text')
+
+    message = serializer.save(
+        sender=request.user,
+        conversation=conversation,
+        reply_to=reply_to,
+        attachment=attachment,
+        message_type=message_type,
+        file_name=file_name,
+        file_size=attachment.size if attachment else 0,
+        file_mime_type=file_mime_type,
+        is_compressed=is_compressed,
+        original_file_size=original_file_size,
+        # video_thumbnail=video_thumbnail,
+        # video_duration=video_duration
+    )
+
+    conversation.save()
+
+    user_status, _ = UserStatus.objects.get_or_create(user=request.user)
+    user_status.is_typing_in = None
+    user_status.typing_started_at = None
+    user_status.save()
+
+    message_data = MessageSerializer(message, context={'request': request, 'broadcast': True}).data
+    send_to_conversation(conversation.conversation_id, "chat_message_broadcast", {
+        "type": "chat_message",
+        "message": message_data
+    })
+
+    return message
 
 
 class ConversationListCreateView(generics.ListCreateAPIView):
@@ -68,102 +131,39 @@ class ConversationDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'conversation_id'
     
     def get_queryset(self):
-        return Conversation.objects.filter(
-            participants=self.request.user
-        ).exclude(
-            user_deletions__user=self.request.user
+        return Conversation.objects.all()
+
+    def get_object(self):
+        conversation = get_participant_conversation(
+            self.request.user, self.kwargs['conversation_id'], include_deleted=False
         )
+        self.check_object_permissions(self.request, conversation)
+        return conversation
 
 
 
-class MessageListCreateView(generics.ListCreateAPIView):
+class MessageListCreateView(ReactionSummaryMixin, ReplyPreviewMixin, generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         conversation_id = self.kwargs['conversation_id']
-        conversation = get_object_or_404(
-            Conversation,
-            conversation_id=conversation_id,
-            participants=self.request.user
-        )
+        if not is_participant(self.request.user, conversation_id):
+            raise Http404('No Conversation matches the given query.')
         
         return Message.objects.filter(
-            conversation=conversation,
+            conversation_id=conversation_id,
             is_deleted=False
         ).exclude(
             user_deletions__user=self.request.user
-        ).prefetch_related('reactions__user', 'sender__profile')
+        ).prefetch_related('sender__profile')
 
     def perform_create(self, serializer):
         conversation_id = self.kwargs['conversation_id']
-        conversation = get_object_or_404(
-            Conversation,
-            conversation_id=conversation_id,
-            participants=self.request.user
-        )
-
-        reply_to = None
-        if 'reply_to' in self.request.data:
-            reply_to = get_object_or_404(Message, message_id=self.request.data['reply_to'])
+        conversation = get_participant_conversation(self.request.user, conversation_id)
 
         attachment = self.request.FILES.get('attachment')
-        original_file_size = 0
-        is_compressed = False
-        video_thumbnail = None
-        video_duration = None
-        file_name = ''
-        file_mime_type = ''
-        
-        if attachment:
-            file_type = FileProcessor.get_file_type(attachment.name)
-            message_type = file_type
-            original_file_size = attachment.size
-            file_name = attachment.name
-            file_mime_type = mimetypes.guess_type(attachment.name)[0] or 'application/octet-stream'
-            
-            if file_type == 'image':
-                attachment, is_compressed = FileProcessor.compress_image(attachment)
-            
-            elif file_type == 'video':
-                # video_thumbnail = FileProcessor.generate_video_thumbnail(attachment)
-                attachment, is_compressed = FileProcessor.compress_video(attachment)
-                
-        else:
-            message_type = self.request.data.get('message_type', 'text')
-
-        message = serializer.save(
-            sender=self.request.user,
-            conversation=conversation,
-            reply_to=reply_to,
-            attachment=attachment,
-            message_type=message_type,
-            file_name=file_name,
-            file_size=attachment.size if attachment else 0,
-            file_mime_type=file_mime_type,
-            is_compressed=is_compressed,
-            original_file_size=original_file_size,
-            # video_thumbnail=video_thumbnail,
-            # video_duration=video_duration
-        )
-
-        conversation.save()
-
-        user_status, _ = UserStatus.objects.get_or_create(user=self.request.user)
-        user_status.is_typing_in = None
-        user_status.typing_started_at = None
-        user_status.save()
-
-        channel_layer = get_channel_layer()
-        message_data = MessageSerializer(message, context={'request': self.request}).data
-        
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{conversation.conversation_id}",
-            {
-                "type": "chat_message_broadcast",
-                "message": serialize_datetime_objects(message_data)
-            }
-        )
+        create_message(self.request, serializer, conversation, attachment)
 
 
 class MessageDetailView(generics.RetrieveUpdateAPIView):
@@ -187,16 +187,11 @@ class MessageDetailView(generics.RetrieveUpdateAPIView):
     def perform_update(self, serializer):
         message = serializer.save()
         
-        channel_layer = get_channel_layer()
-        message_data = MessageSerializer(message, context={'request': self.request}).data
-        
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{message.conversation.conversation_id}",
-            {
-                "type": "message_edited_broadcast",
-                "message": serialize_datetime_objects(message_data)
-            }
-        )
+        message_data = MessageSerializer(message, context={'request': self.request, 'broadcast': True}).data
+        send_to_conversation(message.conversation_id, "message_edited_broadcast", {
+            "type": "message_edited",
+            "message": message_data
+        })
 
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated])
@@ -204,7 +199,7 @@ def delete_message(request, message_id):
    
     message = get_object_or_404(Message, message_id=message_id)
     
-    if not message.conversation.participants.filter(acc_id=request.user.acc_id).exists():
+    if not is_participant(request.user, message.conversation_id):
         return Response({'error': 'You do not have permission to delete this message'}, 
                        status=status.HTTP_403_FORBIDDEN)
     
@@ -214,18 +209,13 @@ def delete_message(request, message_id):
     )
     
     if created:
-        channel_layer = get_channel_layer()
         user_data = UserDisplaySerializer(request.user).data
-        
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{message.conversation.conversation_id}",
-            {
-                "type": "message_deleted_broadcast",
-                "message_id": str(message_id),
-                "user_data": serialize_datetime_objects(user_data),
-                "timestamp": timezone.now().isoformat()
-            }
-        )
+        send_to_conversation(message.conversation_id, "message_deleted_broadcast", {
+            "type": "message_deleted",
+            "message_id": str(message_id),
+            "user_data": user_data,
+            "timestamp": timezone.now().isoformat()
+        }, message_id=str(message_id))
         
         return Response({'status': 'Message deleted successfully'})
     else:
@@ -235,11 +225,7 @@ def delete_message(request, message_id):
 @permission_classes([permissions.IsAuthenticated])
 def delete_conversation(request, conversation_id):
 
-    conversation = get_object_or_404(
-        Conversation,
-        conversation_id=conversation_id,
-        participants=request.user
-    )
+    conversation = get_participant_conversation(request.user, conversation_id)
     
     deletion, created = ConversationDeletion.objects.get_or_create(
         conversation=conversation,
@@ -260,16 +246,11 @@ def restore_message(request, message_id):
         deletion = MessageDeletion.objects.get(message=message, user=request.user)
         deletion.delete()
         
-        channel_layer = get_channel_layer()
-        message_data = MessageSerializer(message, context={'request': request}).data
-        
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{message.conversation.conversation_id}",
-            {
-                "type": "message_restored_broadcast",
-                "message": serialize_datetime_objects(message_data)
-            }
-        )
+        message_data = MessageSerializer(message, context={'request': request, 'broadcast': True}).data
+        send_to_conversation(message.conversation_id, "message_restored_broadcast", {
+            "type": "message_restored",
+            "message": message_data
+        })
         
         return Response({'status': 'Message restored successfully'})
     except MessageDeletion.DoesNotExist:
@@ -279,11 +260,7 @@ def restore_message(request, message_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def restore_conversation(request, conversation_id):
-    conversation = get_object_or_404(
-        Conversation,
-        conversation_id=conversation_id,
-        participants=request.user
-    )
+    conversation = get_participant_conversation(request.user, conversation_id)
     
     try:
         deletion = ConversationDeletion.objects.get(conversation=conversation, user=request.user)
@@ -296,11 +273,7 @@ def restore_conversation(request, conversation_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_messages_read(request, conversation_id):
-    conversation = get_object_or_404(
-        Conversation,
-        conversation_id=conversation_id,
-        participants=request.user
-    )
+    conversation = get_participant_conversation(request.user, conversation_id)
     
     latest_message = conversation.messages.filter(
         is_deleted=False
@@ -315,18 +288,13 @@ def mark_messages_read(request, conversation_id):
             defaults={'read_at': timezone.now()}
         )
         
-        channel_layer = get_channel_layer()
         user_data = UserDisplaySerializer(request.user).data
-        
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{conversation.conversation_id}",
-            {
-                "type": "read_receipt_broadcast",
-                "message_id": str(latest_message.message_id),
-                "user_data": serialize_datetime_objects(user_data),
-                "read_at": timezone.now().isoformat()
-            }
-        )
+        send_to_conversation(conversation.conversation_id, "read_receipt_broadcast", {
+            "type": "read_receipt",
+            "message_id": str(latest_message.message_id),
+            "user_data": user_data,
+            "read_at": timezone.now().isoformat()
+        }, sender_id=request.user.acc_id)
     
     return Response({'status': 'Messages marked as read'})
 
@@ -335,22 +303,29 @@ def mark_messages_read(request, conversation_id):
 def get_or_create_conversation(request, user_id):
     other_user = get_object_or_404(Account, acc_id=user_id)
     
-    conversation = Conversation.objects.filter(
-        participants=request.user,
-        is_group=False
-    ).filter(
-        participants=other_user
-    ).exclude(
-        user_deletions__user=request.user
-    ).first()
-    
-    if not conversation:
-        conversation = Conversation.objects.create(is_group=False, created_by=request.user)
-        conversation.participants.add(request.user, other_user)
+    conversation = Conversation.get_or_create_direct(request.user, other_user)
     
     serializer = ConversationSerializer(conversation, context={'request': request})
     return Response(serializer.data)
 
+class MessageReactionListView(generics.ListAPIView):
+    """Who reacted to a message, newest first, optionally filtered with ?reaction=<type>"""
+    serializer_class = MessageReactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        message = get_object_or_404(Message, message_id=self.kwargs['message_id'])
+        if not is_participant(self.request.user, message.conversation_id):
+            raise Http404('No Message matches the given query.')
+        reactions = MessageReaction.objects.filter(message=message).select_related(
+            'user__profile', 'user__status'
+        ).order_by('-created_at')
+
+        reaction_type = self.request.query_params.get('reaction')
+        if reaction_type:
+            reactions = reactions.filter(reaction=reaction_type)
+        return reactions
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def add_reaction(request, message_id):
@@ -374,23 +349,17 @@ def add_reaction(request, message_id):
         action = "removed"
     else:
         reaction_data = MessageReactionSerializer(reaction).data
-        reaction_data = serialize_datetime_objects(reaction_data)
     
-    channel_layer = get_channel_layer()
     user_data = UserDisplaySerializer(request.user).data
-    
-    async_to_sync(channel_layer.group_send)(
-        f"chat_{message.conversation.conversation_id}",
-        {
-            "type": "reaction_broadcast",
-            "message_id": str(message_id),
-            "reaction": reaction_type,
-            "user_data": serialize_datetime_objects(user_data),
-            "action": action,
-            "reaction_data": reaction_data,
-            "timestamp": timezone.now().isoformat()
-        }
-    )
+    send_to_conversation(message.conversation_id, "reaction_broadcast", {
+        "type": "reaction",
+        "message_id": str(message_id),
+        "reaction": reaction_type,
+        "user_data": user_data,
+        "action": action,
+        "reaction_data": reaction_data,
+        "timestamp": timezone.now().isoformat()
+    })
     
     return Response({
         'status': f'Reaction {action}',
@@ -401,11 +370,7 @@ def add_reaction(request, message_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def set_typing_status(request, conversation_id):
-    conversation = get_object_or_404(
-        Conversation,
-        conversation_id=conversation_id,
-        participants=request.user
-    )
+    conversation = get_participant_conversation(request.user, conversation_id)
     
     is_typing = request.data.get('is_typing', False)
     user_status, _ = UserStatus.objects.get_or_create(user=request.user)
@@ -419,18 +384,13 @@ def set_typing_status(request, conversation_id):
     
     user_status.save()
     
-    channel_layer = get_channel_layer()
     user_data = UserDisplaySerializer(request.user).data
-    
-    async_to_sync(channel_layer.group_send)(
-        f"chat_{conversation.conversation_id}",
-        {
-            "type": "user_typing_broadcast",
-            "user_data": serialize_datetime_objects(user_data),
-            "is_typing": is_typing,
-            "timestamp": timezone.now().isoformat()
-        }
-    )
+    send_to_conversation(conversation.conversation_id, "user_typing_broadcast", {
+        "type": "user_typing",
+        "user_data": user_data,
+        "is_typing": is_typing,
+        "timestamp": timezone.now().isoformat()
+    }, sender_id=request.user.acc_id)
     
     return Response({'status': 'Typing status updated'})
 
@@ -444,24 +404,173 @@ def update_user_status(request):
     user_status.last_seen = timezone.now()
     user_status.save()
     
-    channel_layer = get_channel_layer()
     user_data = UserDisplaySerializer(request.user).data
     
-    conversations = Conversation.objects.filter(
-        participants=request.user
-    ).exclude(
-        user_deletions__user=request.user
-    )
+    conversation_ids = active_conversation_ids(request.user)
     
-    for conversation in conversations:
-        async_to_sync(channel_layer.group_send)(
-            f"chat_{conversation.conversation_id}",
-            {
-                "type": "status_broadcast",
-                "user_data": serialize_datetime_objects(user_data),
-                "status": status_value,
-                "timestamp": timezone.now().isoformat()
-            }
-        )
+    # One frame for every conversation the user is in
+    send_to_conversations(conversation_ids, "status_broadcast", {
+        "type": "user_status",
+        "user_data": user_data,
+        "status": status_value,
+        "timestamp": timezone.now().isoformat()
+    }, sender_id=request.user.acc_id)
     
-    return Response({'status': f'Status updated to {status_value}'})
\ No newline at end of file
+    return Response({'status': f'Status updated to {status_value}'})
+
+
+# Chunked, resumable attachment uploads
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def init_chunked_upload(request, conversation_id):
+    conversation = get_participant_conversation(request.user, conversation_id)
+
+    serializer = AttachmentUploadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    upload = serializer.save(conversation=conversation, user=request.user)
+
+    os.makedirs(os.path.dirname(upload.temp_path), exist_ok=True)
+    open(upload.temp_path, 'wb').close()
+
+    return Response(AttachmentUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def chunked_upload_status(request, upload_id):
+    upload = get_object_or_404(AttachmentUpload, upload_id=upload_id, user=request.user)
+    return Response(AttachmentUploadSerializer(upload).data)
+
+
+@api_view(['PUT'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_chunk(request, upload_id, index):
+    """Write chunk N of a pending upload. The raw request body is the chunk."""
+    upload = get_object_or_404(AttachmentUpload, upload_id=upload_id, user=request.user, status='pending')
+
+    # Chunks are accepted in order; re-sending an already received chunk is allowed
+    if index >= upload.total_chunks or index > upload.received_chunks:
+        return Response({
+            'error': 'Unexpected chunk',
+            'next_chunk': upload.received_chunks
+        }, status=status.HTTP_409_CONFLICT)
+
+    expected_length = upload.expected_chunk_length(index)
+    stream = request.stream
+    written = 0
+    with open(upload.temp_path, 'r+b') as f:
+        f.seek(index * upload.chunk_size)
+        while stream is not None:
+            data = stream.read(64 * 1024)
+            if not data:
+                break
+            written += len(data)
+            if written > expected_length:
+                break
+            f.write(data)
+
+    if written != expected_length:
+        return Response({
+            'error': f'Chunk {index} must be exactly {expected_length} bytes',
+            'next_chunk': upload.received_chunks
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # The first chunk carries the file header, so mismatched content is
+    # refused before the rest of the file is sent
+    if index == 0:
+        with open(upload.temp_path, 'rb') as f:
+            try:
+                FileProcessor.validate_file_signature(f, upload.file_name)
+            except ValidationError as e:
+                return Response({'error': e.messages[0]}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    if index == upload.received_chunks:
+        AttachmentUpload.objects.filter(
+            upload_id=upload.upload_id,
+            received_chunks=index
+        ).update(received_chunks=index + 1, updated_at=timezone.now())
+        upload.refresh_from_db()
+
+    return Response(AttachmentUploadSerializer(upload).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def complete_chunked_upload(request, upload_id):
+    """Assemble the uploaded chunks and send them as a message attachment"""
+    upload = get_object_or_404(
+        AttachmentUpload,
+        upload_id=upload_id,
+        user=request.user,
+        status='pending'
+    )
+    if not is_participant(request.user, upload.conversation_id):
+        raise Http404('No AttachmentUpload matches the given query.')
+
+    if not upload.is_assembled:
+        return Response({
+            'error': 'Upload is incomplete',
+            'next_chunk': upload.received_chunks
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Claim the upload so a retried or concurrent complete can't send it twice
+    claimed = AttachmentUpload.objects.filter(
+        upload_id=upload.upload_id,
+        status='pending'
+    ).update(status='processing', updated_at=timezone.now())
+    if not claimed:
+        return Response({'error': 'Upload is already being completed'},
+                       status=status.HTTP_409_CONFLICT)
+
+    try:
+        with open(upload.temp_path, 'rb') as f:
+            attachment = UploadedFile(
+                file=f,
+                name=upload.file_name,
+                content_type=FileProcessor.get_mime_type(upload.file_name),
+                size=upload.file_size
+            )
+            data = {
+                'message_type': request.data.get('message_type', FileProcessor.get_file_type(upload.file_name)),
+                'message_content': request.data.get('message_content', ''),
+            }
+            serializer = MessageSerializer(data=data, context={'request': request, 'attachment': attachment})
+            serializer.is_valid(raise_exception=True)
+            message = create_message(request, serializer, upload.conversation, attachment)
+    except Exception:
+        # Let the client retry the complete
+        AttachmentUpload.objects.filter(
+            upload_id=upload.upload_id,
+            status='processing'
+        ).update(status='pending', updated_at=timezone.now())
+        raise
+
+    upload.status = 'complete'
+    upload.save(update_fields=['status', 'updated_at'])
+    upload.discard_temp_file()
+
+    return Response(
+        MessageSerializer(message, context={'request': request}).data,
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def serve_spooled_media(request, name):
+    # Media that is still waiting in the write-behind spool is served from local
+    # disk; once replicated, clients are sent on to the public media URL.
+    if name.endswith(WORK_SUFFIXES):
+        # In-progress writes and uploader claims are never served
+        raise Http404
+    spool_root = getattr(default_storage, 'spool_root', None)
+    if spool_root:
+        try:
+            path = safe_join(spool_root, name)
+        except SuspiciousFileOperation:
+            return Response({'error': 'Invalid path'}, status=status.HTTP_400_BAD_REQUEST)
+        if os.path.isfile(path):
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            return FileResponse(open(path, 'rb'), content_type=content_type)
+
+    return redirect(f"{settings.MEDIA_URL.rstrip('/')}/{name}")
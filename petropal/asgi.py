@@ -31,6 +31,8 @@ from channels.auth import AuthMiddlewareStack
 
 # 1. Set the settings module first
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petropal.settings')
+# Replicate leftover spooled media in the serving process only
+os.environ.setdefault('MEDIA_SPOOL_AUTOSTART', 'true')
 
 # 2. Initialize Django apps before importing anything that touches models
 django_asgi_app = get_asgi_application()
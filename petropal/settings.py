@@ -91,6 +91,10 @@ ASGI_APPLICATION = 'petropal.asgi.application'
 # REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 # REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/0'
 REDIS_URL = os.getenv("REDIS_URL")
+# utils.redis_client; seconds
+REDIS_CONNECT_TIMEOUT = 0.5
+REDIS_SOCKET_TIMEOUT = 1
+REDIS_HEALTH_CHECK_INTERVAL = 30
 
 CHANNEL_LAYERS = {
     'default': {
@@ -101,18 +105,64 @@ CHANNEL_LAYERS = {
     },
 }
 
-# # ======================
-# # Cache using Redis
-# # ======================
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         }
-#     }
-# }
+# ======================
+# Celery
+# ======================
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-expired-tokens': {
+        'task': 'accounts.tasks.cleanup_expired_tokens',
+        'schedule': 60 * 60,
+    },
+    'flush-email-outbox': {
+        'task': 'accounts.tasks.flush_email_outbox_task',
+        'schedule': 60,
+    },
+    'cleanup-stale-uploads': {
+        'task': 'chat.tasks.cleanup_stale_uploads',
+        'schedule': 60 * 60,
+    },
+    'flush-profile-visits': {
+        'task': 'profiles.tasks.flush_profile_visits_task',
+        'schedule': 60,
+    },
+    'rollup-profile-visits': {
+        'task': 'profiles.tasks.rollup_profile_visits_task',
+        'schedule': 15 * 60,
+    },
+    'purge-profile-visits': {
+        'task': 'profiles.tasks.purge_profile_visits_task',
+        'schedule': 24 * 60 * 60,
+    },
+    'reconcile-profile-counters': {
+        'task': 'profiles.tasks.reconcile_profile_counters_task',
+        'schedule': 24 * 60 * 60,
+    },
+    'rebuild-search-index': {
+        'task': 'profiles.tasks.rebuild_search_index_task',
+        'schedule': 24 * 60 * 60,
+    },
+}
+
+# ======================
+# Cache using Redis
+# ======================
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv("CACHE_REDIS_URL", REDIS_URL),
+        "KEY_PREFIX": "petropal",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # degrade to cache misses instead of failing requests if Redis is down
+            "IGNORE_EXCEPTIONS": True,
+        }
+    }
+}
+
+# TTL for read-through cached API responses (shared.cache.cached_response)
+API_CACHE_TIMEOUT = 60
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -156,6 +206,14 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@ontapke.com')
 
+# Outbound email queue (accounts.mailer)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_SCHEDULE_TTL = 60  # seconds before a lost flush task gets rescheduled
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60   # seconds before a flush that hit a send failure runs again
+EMAIL_OUTBOX_LOCK_TTL = 5 * 60  # refreshed after every batch
+EMAIL_OUTBOX_OTP_MAX_AGE = 10 * 60  # queued OTP emails are dropped once the code has expired (OTPCode)
+
 
 
 AUTHENTICATION_BACKENDS = [
@@ -213,7 +271,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 STORAGES = {
     "default": {
-        "BACKEND": "chat.storage_backends.CPanelSFTPStorage",
+        "BACKEND": "chat.storage_backends.WriteBehindSFTPStorage",
     },
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
@@ -237,6 +295,20 @@ SFTP_STORAGE_DIR_MODE = 0o755
 MEDIA_URL = 'https://ontapke.com/media/petropal_media/'
 MEDIA_ROOT = '/home/ontapke/petropal-main/media/petropal_media/'
 
+# Local write-behind spool in front of the SFTP host. Uploads land here first
+# and are replicated in the background.
+MEDIA_SPOOL_ROOT = os.getenv('MEDIA_SPOOL_ROOT', os.path.join(BASE_DIR, 'media_spool'))
+MEDIA_SPOOL_MAX_RETRIES = int(os.getenv('MEDIA_SPOOL_MAX_RETRIES', 8))
+MEDIA_SPOOL_RETRY_DELAY = 5  # seconds, doubled after every failed attempt
+MEDIA_SPOOL_RESCAN_SECONDS = 60  # idle time before the uploader rescans the spool
+MEDIA_SPOOL_CLAIM_TTL = 30 * 60  # a claim this old was left by a dead process
+# Files that could not be replicated after MEDIA_SPOOL_MAX_RETRIES
+MEDIA_SPOOL_DEAD_LETTER_ROOT = os.getenv('MEDIA_SPOOL_DEAD_LETTER_ROOT', os.path.join(BASE_DIR, 'media_spool_failed'))
+# Start the uploader at startup to replicate files left by a previous run.
+# Only the ASGI/WSGI entry points turn this on, so migrate, shell, tests and
+# Celery workers don't scan the spool.
+MEDIA_SPOOL_AUTOSTART = os.getenv('MEDIA_SPOOL_AUTOSTART', 'false').lower() == 'true'
+
 
 # File upload settings --- message attachments
 MAX_FILE_SIZE = 50 * 1024 * 1024      # 50MB default max file size
@@ -250,6 +322,20 @@ ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
 ALLOWED_DOCUMENT_EXTENSIONS = ['.pdf', '.doc', '.docx', '.txt', '.xlsx', '.csv']
 ALLOWED_AUDIO_EXTENSIONS = ['.mp3', '.wav', '.aac']
 
+# Chunked, resumable attachment uploads
+CHUNKED_UPLOAD_ROOT = os.getenv('CHUNKED_UPLOAD_ROOT', os.path.join(BASE_DIR, 'upload_chunks'))
+CHUNKED_UPLOAD_CHUNK_SIZE = 1 * 1024 * 1024      # 1MB default chunk
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# Chat WebSocket frame metrics (chat.metrics)
+CHAT_FRAME_SIZE_BUDGET = 8 * 1024             # frames above this are counted as over budget
+CHAT_FRAME_METRICS_FLUSH_SECONDS = 60
+
+# Per-user conversation membership sets in Redis (chat.membership). Kept
+# short since they gate access.
+CHAT_MEMBERSHIP_CACHE_TTL = 5 * 60
+
 COMPRESS_IMAGES = True
 COMPRESS_VIDEOS = True
 IMAGE_QUALITY = 85  # JPEG quality (1-100)
@@ -409,10 +495,37 @@ CSRF_COOKIE_HTTPONLY = True
 # Rate limiting
 RATE_LIMIT_ENABLED = True
 
+# Checked in order by accounts.middleware.SecurityMiddleware, the first matching
+# path prefix applies. `limit` requests per `window` seconds per client IP.
+RATE_LIMIT_RULES = [
+    {'name': 'login', 'path': '/acc/api/auth/login/', 'limit': 5, 'window': 300},
+    {'name': 'register', 'path': '/acc/api/auth/register/', 'limit': 3, 'window': 3600},
+    {'name': 'auth', 'path': '/acc/api/auth/', 'limit': 20, 'window': 60},
+]
+
 
 #app settings
 APP_NAME = 'Petropal'
 
+# User discovery search (profiles.search); must match MySQL's ngram_token_size
+USER_SEARCH_NGRAM_TOKEN_SIZE = 2
+
+# Profile visits (profiles.visit_tracking): one counted visit per visitor per window
+PROFILE_VISIT_DEDUP_DAYS = 30
+PROFILE_VISIT_FLUSH_BATCH_SIZE = 500
+PROFILE_VISIT_FLUSH_LOCK_TTL = 5 * 60   # refreshed after every batch
+# Days before today recomputed by each rollup run (profiles.visit_rollups)
+PROFILE_VISIT_ROLLUP_LOOKBACK_DAYS = 1
+# Raw visits older than this are rolled up and removed (profiles.visit_retention)
+PROFILE_VISIT_RETENTION_DAYS = 90
+PROFILE_VISIT_PURGE_BATCH_SIZE = 5000
+# Batches per task run; the task re-queues itself while expired rows remain
+PROFILE_VISIT_PURGE_MAX_BATCHES = 20
+# Copy removed visits to profile_visits_archive instead of discarding them
+PROFILE_VISIT_ARCHIVE = False
+# Monthly partitions kept ready beyond the current month once the table is partitioned
+PROFILE_VISIT_PARTITION_MONTHS_AHEAD = 3
+
 
 
 
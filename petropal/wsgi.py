@@ -3,5 +3,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petropal.settings')
+# Replicate leftover spooled media in the serving process only
+os.environ.setdefault('MEDIA_SPOOL_AUTOSTART', 'true')
 
 application = get_wsgi_application()
@@ -1,13 +1,13 @@
 from django.contrib import admin
 
 from django.utils.html import format_html
-from .models import UserProfile, Follow, Rating, Badge, ProfileVisit
+from .models import UserProfile, Follow, Rating, Badge, ProfileVisit, ProfileVisitDaily, ProfileVisitArchive
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'company_name', 'location', 'country', 'city', 'is_omc', 'timezone', 'created_at', 'updated_at')
     search_fields = ('user__email', 'company_name', 'location', 'country', 'city')
     list_filter = ('is_omc', 'created_at')
-    readonly_fields = ('profile_id', 'created_at', 'updated_at')
+    readonly_fields = ('profile_id', 'followers_count', 'following_count', 'ratings_count', 'rating_sum', 'created_at', 'updated_at')
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
@@ -52,3 +52,26 @@ class ProfileVisitAdmin(admin.ModelAdmin):
     
     def has_add_permission(self, request):
         return False
+
+
+@admin.register(ProfileVisitDaily)
+class ProfileVisitDailyAdmin(admin.ModelAdmin):
+    list_display = ('profile_owner', 'day', 'total_visits', 'authenticated_visits', 'anonymous_visits', 'unique_visitors')
+    search_fields = ('profile_owner__email',)
+    list_filter = ('day',)
+    readonly_fields = ('profile_owner', 'day', 'total_visits', 'authenticated_visits', 'anonymous_visits', 'unique_visitors', 'updated_at')
+    exclude = ('visitor_sketch',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ProfileVisitArchive)
+class ProfileVisitArchiveAdmin(admin.ModelAdmin):
+    list_display = ('profile_owner_id', 'visitor_id', 'visitor_ip', 'created_at', 'archived_at')
+    search_fields = ('profile_owner_id', 'visitor_id', 'visitor_ip')
+    list_filter = ('created_at',)
+    readonly_fields = ('visit_id', 'profile_owner_id', 'visitor_id', 'visitor_ip', 'created_at', 'archived_at')
+
+    def has_add_permission(self, request):
+        return False
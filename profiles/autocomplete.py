@@ -0,0 +1,220 @@
+"""
+Typeahead autocomplete over verified, active accounts.
+
+The index lives in Redis as one sorted set of "<term>\\0<acc_id>" members with
+equal scores, so ZRANGEBYLEX answers any prefix in O(log n). It returns
+matches in lexicographic order; suggest() re-orders the fetched window so the
+shortest matching terms come first. Terms are the normalized full name,
+company name and each of their words. A hash holds the compact document (id,
+display name, avatar) returned to the client, so a lookup is two Redis round
+trips and no database queries. The avatar is stored as its storage name and
+turned into a URL when read, since a spooled upload's URL changes once it is
+replicated. Entries are refreshed by the same signals as the
+search index; if Redis is unreachable suggestions come from the database.
+
+A full rebuild writes temporary keys and renames them over the live ones.
+While it runs, incremental updates also record the account in a dirty set,
+and those accounts are re-indexed once the rebuilt index is swapped in, so
+changes made during the rebuild are not lost.
+"""
+import json
+import logging
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from profiles.models import Account, UserProfile
+from profiles.search import (
+    ACCOUNT_SEARCH_FIELDS, PROFILE_SEARCH_FIELDS, is_searchable, normalize, search_accounts,
+)
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TERMS_KEY = 'autocomplete:terms'
+DOCUMENTS_KEY = 'autocomplete:documents'
+REBUILDING_KEY = 'autocomplete:rebuilding'
+DIRTY_KEY = 'autocomplete:rebuild_dirty'
+REBUILD_TIMEOUT = 60 * 60  # the rebuild marker expires if a rebuild dies
+SEPARATOR = '\x00'
+MAX_TERM_LENGTH = 64
+
+# Profile fields shown in suggestions on top of the searchable ones
+PROFILE_AUTOCOMPLETE_FIELDS = PROFILE_SEARCH_FIELDS | {'profile_picture'}
+
+AVATAR_STORAGE = UserProfile._meta.get_field('profile_picture').storage
+
+
+def account_terms(account):
+    profile = getattr(account, 'profile', None)
+    terms = set()
+    for text in (account.full_name, profile.company_name if profile else None):
+        text = normalize(text)
+        if text:
+            terms.add(text[:MAX_TERM_LENGTH])
+            terms.update(word[:MAX_TERM_LENGTH] for word in text.split())
+    return terms
+
+
+def build_document(account):
+    profile = getattr(account, 'profile', None)
+    return {
+        'id': account.acc_id,
+        'display_name': account.full_name or account.email.split('@')[0],
+        'avatar_name': profile.profile_picture.name if profile and profile.profile_picture else None,
+    }
+
+
+def client_document(document):
+    """The {id, display_name, avatar} shape returned to clients"""
+    avatar_name = document.pop('avatar_name', None)
+    document.pop('terms', None)
+    document['avatar'] = AVATAR_STORAGE.url(avatar_name) if avatar_name else None
+    return document
+
+
+def members_for(acc_id, terms):
+    return [f'{term}{SEPARATOR}{acc_id}' for term in terms]
+
+
+def build_entry(account):
+    terms = account_terms(account)
+    document = build_document(account)
+    document['terms'] = sorted(terms)
+    return document
+
+
+def write_entry(pipe, document, terms_key=TERMS_KEY, documents_key=DOCUMENTS_KEY):
+    if document['terms']:
+        pipe.zadd(terms_key, {member: 0 for member in members_for(document['id'], document['terms'])})
+    pipe.hset(documents_key, document['id'], json.dumps(document))
+
+
+def index_account(account, searchable=None):
+    """Replace the account's terms and document, or drop them if it is no longer searchable"""
+    searchable = is_searchable(account) if searchable is None else searchable
+    try:
+        client = get_redis()
+        if client.exists(REBUILDING_KEY):
+            client.sadd(DIRTY_KEY, account.acc_id)
+        previous = client.hget(DOCUMENTS_KEY, account.acc_id)
+        previous = json.loads(previous) if previous else None
+        document = build_entry(account) if searchable else None
+        if previous == document:
+            return
+
+        pipe = client.pipeline()
+        if previous:
+            if previous['terms']:
+                pipe.zrem(TERMS_KEY, *members_for(account.acc_id, previous['terms']))
+            pipe.hdel(DOCUMENTS_KEY, account.acc_id)
+        if document:
+            write_entry(pipe, document)
+        pipe.execute()
+    except Exception as e:
+        # The nightly rebuild repairs entries missed while Redis was down
+        logger.warning(f"Autocomplete index update failed for {account.acc_id}: {str(e)}")
+
+
+def rebuild_autocomplete_index(batch_size=1000):
+    """Build the index under temporary keys and swap it in atomically. Returns the number indexed."""
+    client = get_redis()
+    terms_key = f'{TERMS_KEY}:rebuild'
+    documents_key = f'{DOCUMENTS_KEY}:rebuild'
+    client.delete(terms_key, documents_key, DIRTY_KEY)
+    client.set(REBUILDING_KEY, 1, ex=REBUILD_TIMEOUT)
+
+    try:
+        accounts = Account.objects.filter(is_verified=True, state=1).select_related('profile').order_by('pk')
+        indexed = 0
+        pipe = client.pipeline(transaction=False)
+        for account in accounts.iterator(chunk_size=batch_size):
+            write_entry(pipe, build_entry(account), terms_key, documents_key)
+            indexed += 1
+            if indexed % batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+        swap = client.pipeline()
+        swap.delete(TERMS_KEY, DOCUMENTS_KEY)
+        if client.exists(terms_key):
+            swap.rename(terms_key, TERMS_KEY)
+        if client.exists(documents_key):
+            swap.rename(documents_key, DOCUMENTS_KEY)
+        swap.execute()
+    finally:
+        client.delete(REBUILDING_KEY)
+
+    reindex_dirty_accounts(client, batch_size)
+    return indexed
+
+
+def reindex_dirty_accounts(client, batch_size=1000):
+    """Re-apply updates made while a rebuild was running, which the swap overwrote"""
+    while True:
+        acc_ids = [acc_id.decode() for acc_id in client.spop(DIRTY_KEY, batch_size) or []]
+        if not acc_ids:
+            break
+        accounts = Account.objects.filter(acc_id__in=acc_ids).select_related('profile').in_bulk()
+        for acc_id in acc_ids:
+            account = accounts.get(acc_id)
+            if account is None:
+                index_account(Account(acc_id=acc_id), searchable=False)
+            else:
+                index_account(account)
+
+
+def suggest(query, limit=10, exclude=None):
+    """Return up to `limit` {id, display_name, avatar} documents whose terms start with `query`"""
+    prefix = normalize(query)[:MAX_TERM_LENGTH]
+    if not prefix:
+        return []
+
+    try:
+        client = get_redis()
+        encoded = prefix.encode()
+        # Over-fetch: one account can match through several terms
+        members = client.zrangebylex(TERMS_KEY, b'[' + encoded, b'[' + encoded + b'\xff', start=0, num=limit * 4)
+        # Shortest terms first, i.e. the closest matches within the window
+        matches = sorted(
+            (member.decode().rsplit(SEPARATOR, 1) for member in members),
+            key=lambda match: len(match[0]),
+        )
+        acc_ids = []
+        for term, acc_id in matches:
+            if acc_id != exclude and acc_id not in acc_ids:
+                acc_ids.append(acc_id)
+        acc_ids = acc_ids[:limit]
+        if not acc_ids:
+            return []
+        documents = [json.loads(raw) for raw in client.hmget(DOCUMENTS_KEY, acc_ids) if raw]
+    except Exception as e:
+        logger.warning(f"Autocomplete index unavailable, falling back to the database: {str(e)}")
+        return suggest_from_database(query, limit, exclude)
+
+    return [client_document(document) for document in documents]
+
+
+def suggest_from_database(query, limit=10, exclude=None):
+    acc_ids = search_accounts(query, limit=limit, exclude=exclude)
+    accounts = Account.objects.filter(acc_id__in=acc_ids).select_related('profile')
+    documents = {account.acc_id: client_document(build_document(account)) for account in accounts}
+    return [documents[acc_id] for acc_id in acc_ids if acc_id in documents]
+
+
+@receiver(post_save, sender=Account)
+def autocomplete_saved_account(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not ACCOUNT_SEARCH_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: index_account(instance))
+
+
+@receiver(post_save, sender=UserProfile)
+def autocomplete_saved_profile(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not PROFILE_AUTOCOMPLETE_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: index_account(instance.user))
+
+
+@receiver(post_delete, sender=Account)
+def autocomplete_deleted_account(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_account(instance, searchable=False))
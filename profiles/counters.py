@@ -0,0 +1,97 @@
+"""
+Denormalized follow/rating counters on UserProfile.
+
+Writes go through single UPDATE ... SET col = col + n statements so concurrent
+follows and ratings never lose increments; decrements stop at zero so a
+counter that already drifted low can't fail the write. The nightly
+reconcile-profile-counters task runs reconcile_profile_counters(), which
+recomputes the true values for drift caused by writes outside these paths
+(admin status changes, cascading account deletes, raw SQL).
+"""
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from profiles.models import UserProfile, Follow, Rating
+
+COUNTER_FIELDS = ('followers_count', 'following_count', 'ratings_count', 'rating_sum')
+
+
+def adjust_profile_counters(user, **deltas):
+    """Apply signed deltas, e.g. adjust_profile_counters(user, followers_count=1)"""
+    # Decrements are clamped without computing a negative value, which an
+    # UNSIGNED MySQL column rejects before GREATEST() could apply
+    updates = {
+        field: F(field) + delta if delta > 0 else Case(
+            When(**{f'{field}__gte': -delta}, then=F(field) + delta),
+            default=Value(0),
+        )
+        for field, delta in deltas.items() if delta
+    }
+    if updates:
+        UserProfile.objects.filter(user=user).update(**updates)
+
+
+def record_follow(follower, following, delta=1):
+    adjust_profile_counters(follower, following_count=delta)
+    adjust_profile_counters(following, followers_count=delta)
+
+
+def record_rating(rated, count_delta, sum_delta):
+    adjust_profile_counters(rated, ratings_count=count_delta, rating_sum=sum_delta)
+
+
+def _count_subquery(queryset, group_field, aggregate):
+    # Correlated per-account aggregate that still yields 0 when there are no rows
+    subquery = queryset.order_by().values(group_field).annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+
+def followers_count_subquery(outer_ref='pk'):
+    return _count_subquery(Follow.objects.filter(following=OuterRef(outer_ref)), 'following', Count('pk'))
+
+
+def following_count_subquery(outer_ref='pk'):
+    return _count_subquery(Follow.objects.filter(follower=OuterRef(outer_ref)), 'follower', Count('pk'))
+
+
+def ratings_count_subquery(outer_ref='pk'):
+    active = Rating.objects.filter(rated=OuterRef(outer_ref), status='active')
+    return _count_subquery(active, 'rated', Count('pk'))
+
+
+def rating_sum_subquery(outer_ref='pk'):
+    active = Rating.objects.filter(rated=OuterRef(outer_ref), status='active')
+    return _count_subquery(active, 'rated', Sum('rating_count'))
+
+
+def actual_counter_values():
+    """Counter field -> expression computing its true value for a UserProfile row"""
+    return {
+        'followers_count': followers_count_subquery('user'),
+        'following_count': following_count_subquery('user'),
+        'ratings_count': ratings_count_subquery('user'),
+        'rating_sum': rating_sum_subquery('user'),
+    }
+
+
+def reconcile_profile_counters(batch_size=500, dry_run=False):
+    """Recompute every profile's counters from the source tables. Returns the number of profiles fixed."""
+    profile_ids = list(UserProfile.objects.order_by('profile_id').values_list('profile_id', flat=True))
+
+    fixed = 0
+    for start in range(0, len(profile_ids), batch_size):
+        batch = profile_ids[start:start + batch_size]
+        stale = Q()
+        for field in COUNTER_FIELDS:
+            stale |= ~Q(**{field: F(f'actual_{field}')})
+        stale_ids = list(
+            UserProfile.objects.filter(pk__in=batch)
+            .annotate(**{f'actual_{field}': value for field, value in actual_counter_values().items()})
+            .filter(stale)
+            .values_list('profile_id', flat=True)
+        )
+        fixed += len(stale_ids)
+        if stale_ids and not dry_run:
+            # Recomputed inside the UPDATE so increments committed since the
+            # comparison above are counted rather than overwritten
+            UserProfile.objects.filter(pk__in=stale_ids).update(**actual_counter_values())
+    return fixed
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Min
+from django.utils import timezone
+from profiles.models import ProfileVisit
+from profiles.visit_retention import is_partitioned, month_start, partitioning_sql
+
+
+class Command(BaseCommand):
+    help = 'Convert profile_visits to monthly RANGE partitions on created_at (MySQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Print the SQL without running it')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError('Partitioning is only supported on MySQL')
+        if is_partitioned():
+            self.stdout.write('profile_visits is already partitioned')
+            return
+
+        first_visit = ProfileVisit.objects.aggregate(first=Min('created_at'))['first']
+        first_month = month_start(timezone.localdate(first_visit) if first_visit else timezone.localdate())
+        statements = partitioning_sql(first_month, settings.PROFILE_VISIT_PARTITION_MONTHS_AHEAD)
+
+        for statement in statements:
+            self.stdout.write(statement)
+            if not options['dry_run']:
+                # Rewrites the whole table: run during a quiet period
+                with connection.cursor() as cursor:
+                    cursor.execute(statement)
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Partitioned profile_visits by month'))
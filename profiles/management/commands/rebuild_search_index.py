@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from profiles.search import rebuild_search_index
+from profiles.autocomplete import rebuild_autocomplete_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the user discovery search and autocomplete indexes from verified, active accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} searchable accounts'))
+        suggested = rebuild_autocomplete_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {suggested} accounts for autocomplete'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from profiles.counters import reconcile_profile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized follower, following and rating counters on user profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted profiles without fixing them')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_profile_counters(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'{fixed} profiles with drifted counters {verb}'))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from profiles.models import ProfileVisit
+from profiles.visit_rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily profile visit rollups, for all history or the last N days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only rebuild the last N days')
+
+    def handle(self, *args, **options):
+        if options['days']:
+            first_day = timezone.localdate() - timedelta(days=options['days'] - 1)
+        else:
+            first_visit = ProfileVisit.objects.aggregate(first=Min('created_at'))['first']
+            if first_visit is None:
+                self.stdout.write('No profile visits to roll up')
+                return
+            first_day = timezone.localdate(first_visit)
+
+        written = backfill_rollups(first_day)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} daily visit rollups from {first_day}'))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:08
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    Follow = apps.get_model('profiles', 'Follow')
+    Rating = apps.get_model('profiles', 'Rating')
+
+    def aggregate(queryset, group_field, value):
+        subquery = queryset.order_by().values(group_field).annotate(value=value).values('value')
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    active_ratings = Rating.objects.filter(rated=OuterRef('user'), status='active')
+    UserProfile.objects.update(
+        followers_count=aggregate(Follow.objects.filter(following=OuterRef('user')), 'following', Count('pk')),
+        following_count=aggregate(Follow.objects.filter(follower=OuterRef('user')), 'follower', Count('pk')),
+        ratings_count=aggregate(active_ratings, 'rated', Count('pk')),
+        rating_sum=aggregate(active_ratings, 'rated', Sum('rating_count')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_userprofile_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='ratings_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
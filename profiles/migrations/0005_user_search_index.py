@@ -0,0 +1,70 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:13
+
+import django.db.models.deletion
+from django.conf import settings
+import unicodedata
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    # ngram parser so substrings match without word boundaries; other backends use LIKE fallbacks
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX user_search_fulltext '
+            'ON user_search_index (full_name, company_name, email) WITH PARSER ngram'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX user_search_fulltext ON user_search_index')
+
+
+def normalize(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def backfill_search_index(apps, schema_editor):
+    Account = apps.get_model(settings.AUTH_USER_MODEL)
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    UserSearchEntry = apps.get_model('profiles', 'UserSearchEntry')
+
+    company_names = dict(UserProfile.objects.values_list('user_id', 'company_name'))
+    entries = [
+        UserSearchEntry(
+            user_id=account.pk,
+            full_name=normalize(account.full_name)[:255],
+            company_name=normalize(company_names.get(account.pk))[:255],
+            email=normalize(account.email)[:254],
+        )
+        for account in Account.objects.filter(is_verified=True, state=1).iterator()
+    ]
+    UserSearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('profiles', '0004_profile_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('full_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('company_name', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'user_search_index',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
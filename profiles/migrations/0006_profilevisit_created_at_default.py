@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profilevisit',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    ProfileVisit = apps.get_model('profiles', 'ProfileVisit')
+    ProfileVisitDaily = apps.get_model('profiles', 'ProfileVisitDaily')
+
+    grouped = ProfileVisit.objects.annotate(day=TruncDate('created_at')).values('profile_owner', 'day').annotate(
+        total=Count('visit_id'),
+        authenticated=Count('visitor'),
+        unique_accounts=Count('visitor', distinct=True),
+        unique_ips=Count('visitor_ip', distinct=True, filter=Q(visitor__isnull=True)),
+    ).order_by()
+    ProfileVisitDaily.objects.bulk_create([
+        ProfileVisitDaily(
+            profile_owner_id=row['profile_owner'],
+            day=row['day'],
+            total_visits=row['total'],
+            authenticated_visits=row['authenticated'],
+            anonymous_visits=row['total'] - row['authenticated'],
+            unique_visitors=row['unique_accounts'] + row['unique_ips'],
+        )
+        for row in grouped.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_profilevisit_created_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileVisitDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total_visits', models.PositiveIntegerField(default=0)),
+                ('authenticated_visits', models.PositiveIntegerField(default=0)),
+                ('anonymous_visits', models.PositiveIntegerField(default=0)),
+                ('unique_visitors', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile_owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visit_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'profile_visit_daily',
+                'constraints': [models.UniqueConstraint(fields=('profile_owner', 'day'), name='unique_profile_visit_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
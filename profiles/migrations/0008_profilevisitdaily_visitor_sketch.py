@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_profilevisitdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilevisitdaily',
+            name='visitor_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0008_profilevisitdaily_visitor_sketch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileVisitArchive',
+            fields=[
+                ('visit_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('profile_owner_id', models.CharField(max_length=64)),
+                ('visitor_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('visitor_ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'profile_visits_archive',
+            },
+        ),
+        migrations.AlterField(
+            model_name='profilevisit',
+            name='profile_owner',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='profile_visits', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='profilevisit',
+            name='visitor',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visits_made', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='profilevisit',
+            index=models.Index(fields=['created_at'], name='profile_vis_created_c0e982_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profilevisitarchive',
+            index=models.Index(fields=['profile_owner_id', 'created_at'], name='profile_vis_profile_d983c1_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:30
+
+from django.db import migrations
+
+
+def rebuild_fulltext_index(apps, schema_editor):
+    # InnoDB fixes an index's stopword list when it is created, and the ngram
+    # parser drops every token containing a stopword, so with the default list
+    # ("a", "i", ...) most names could never match. Recreate the index with
+    # stopwords disabled for this session.
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+        try:
+            schema_editor.execute('DROP INDEX user_search_fulltext ON user_search_index')
+            schema_editor.execute(
+                'CREATE FULLTEXT INDEX user_search_fulltext '
+                'ON user_search_index (full_name, company_name, email) WITH PARSER ngram'
+            )
+        finally:
+            schema_editor.execute('SET SESSION innodb_ft_enable_stopword = DEFAULT')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_profile_visit_retention'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_fulltext_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+from django.db.models import F, IntegerField
+from django.db.models.functions import Coalesce
+from profiles.counters import (
+    followers_count_subquery, following_count_subquery,
+    ratings_count_subquery, rating_sum_subquery,
+)
+
+PROFILE_STAT_SUBQUERIES = {
+    'followers_count': followers_count_subquery,
+    'following_count': following_count_subquery,
+    'ratings_count': ratings_count_subquery,
+    'rating_sum': rating_sum_subquery,
+}
+
+
+def profile_stats_annotations(relation=None):
+    """
+    Annotations computing an account's profile stats inside the list query.
+
+    The denormalized UserProfile counter is used when the profile row exists,
+    the correlated Subquery only runs for accounts without one. `relation` is
+    the account foreign key on the queried model (e.g. 'follower'), or None
+    when querying Account itself.
+    """
+    prefix = f'{relation}__' if relation else ''
+    outer_ref = relation or 'pk'
+    name_prefix = f'{relation}_' if relation else ''
+    return {
+        f'{name_prefix}annotated_{field}': Coalesce(
+            F(f'{prefix}profile__{field}'), subquery(outer_ref), output_field=IntegerField()
+        )
+        for field, subquery in PROFILE_STAT_SUBQUERIES.items()
+    }
+
+
+def annotate_profile_stats(queryset, relation=None):
+    return queryset.annotate(**profile_stats_annotations(relation))
+
+
+def attach_profile_stats(instances, relation):
+    # Move "<relation>_annotated_*" values onto the related account, where AccountProfileSerializer reads them
+    for instance in instances:
+        account = getattr(instance, relation, None)
+        if account is None:
+            continue
+        for field in PROFILE_STAT_SUBQUERIES:
+            name = f'annotated_{field}'
+            setattr(account, name, getattr(instance, f'{relation}_{name}', None))
+    return instances
+
+
+class ProfileStatsQuerysetMixin:
+    """
+    List view mixin that annotates profile stats for every serialized account,
+    so AccountProfileSerializer needs no per-row queries.
+
+    Set `profile_stats_relations` to the account foreign keys of the listed
+    model, or leave it empty when the view lists Account objects.
+    """
+    profile_stats_relations = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.profile_stats_relations:
+            return annotate_profile_stats(queryset)
+        for relation in self.profile_stats_relations:
+            queryset = annotate_profile_stats(queryset, relation)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many') and self.profile_stats_relations:
+            instances = list(args[0])
+            for relation in self.profile_stats_relations:
+                attach_profile_stats(instances, relation)
+            args = (instances, *args[1:])
+        return super().get_serializer(*args, **kwargs)
@@ -1,9 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 import uuid
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from accounts.models import Badge
+from shared.cache import bump_namespace
 import pytz
 Account = get_user_model()
 
@@ -25,6 +27,11 @@ class UserProfile(models.Model):
     # verification_badge = models.CharField(max_length=50, blank=True, null=True)
     badge = models.ForeignKey(Badge, on_delete=models.SET_NULL, null=True, blank=True)
     verification_documents = models.JSONField(default=list, blank=True)
+    # Denormalized counters, maintained with F() updates in profiles.counters
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    ratings_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -36,6 +43,12 @@ class UserProfile(models.Model):
         """Get user's timezone object"""
         return pytz.timezone(self.timezone)    
 
+    @property
+    def average_rating(self):
+        if not self.ratings_count:
+            return 0.0
+        return round(self.rating_sum / self.ratings_count, 1)
+
 
 
 @receiver(post_save, sender=Account)
@@ -82,16 +95,21 @@ class Rating(models.Model):
 
 class ProfileVisit(models.Model):
     visit_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    profile_owner = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='profile_visits')
-    visitor = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='visits_made')
+    # No database FK constraints: MySQL can't partition tables that have them
+    # (see profiles.visit_retention). on_delete is still enforced by Django.
+    profile_owner = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='profile_visits', db_constraint=False)
+    visitor = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='visits_made', db_constraint=False)
     visitor_ip = models.GenericIPAddressField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered visits are written later with their original time
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'profile_visits'
         indexes = [
             models.Index(fields=['profile_owner', 'created_at']),
             models.Index(fields=['visitor_ip', 'created_at']),
+            # Range scans for daily rollups and retention purges
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -99,3 +117,116 @@ class ProfileVisit(models.Model):
         return f"{visitor_name} visited {self.profile_owner.full_name}"
 
 
+class ProfileVisitArchive(models.Model):
+    """Raw visits moved out of profile_visits by retention when PROFILE_VISIT_ARCHIVE is on"""
+    visit_id = models.UUIDField(primary_key=True, editable=False)
+    # Plain ids so archived rows outlive the accounts they reference
+    profile_owner_id = models.CharField(max_length=64)
+    visitor_id = models.CharField(max_length=64, null=True, blank=True)
+    visitor_ip = models.GenericIPAddressField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'profile_visits_archive'
+        indexes = [
+            models.Index(fields=['profile_owner_id', 'created_at']),
+        ]
+
+
+class ProfileVisitDaily(models.Model):
+    """Per-owner, per-day visit totals rolled up from ProfileVisit by profiles.visit_rollups"""
+    profile_owner = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='visit_rollups')
+    day = models.DateField()
+    total_visits = models.PositiveIntegerField(default=0)
+    authenticated_visits = models.PositiveIntegerField(default=0)
+    anonymous_visits = models.PositiveIntegerField(default=0)
+    # Distinct visitor accounts plus distinct anonymous IPs within the day
+    unique_visitors = models.PositiveIntegerField(default=0)
+    # Serialized utils.hyperloglog sketch of the same visitors, merged for multi-day ranges
+    visitor_sketch = models.BinaryField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'profile_visit_daily'
+        constraints = [
+            models.UniqueConstraint(fields=['profile_owner', 'day'], name='unique_profile_visit_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_owner_id} {self.day}: {self.total_visits} visits"
+
+
+class UserSearchEntry(models.Model):
+    """
+    Normalized search document for one verified, active account.
+
+    Maintained by profiles.search; rows only exist for accounts that may appear
+    in user discovery. On MySQL the text columns carry a FULLTEXT ngram index
+    and the name columns B-tree indexes for prefix lookups.
+    """
+    user = models.OneToOneField(Account, on_delete=models.CASCADE, primary_key=True, related_name='search_entry')
+    full_name = models.CharField(max_length=255, blank=True, db_index=True)
+    company_name = models.CharField(max_length=255, blank=True, db_index=True)
+    email = models.CharField(max_length=254, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_search_index'
+
+    def __str__(self):
+        return self.full_name or self.email
+
+
+def profile_cache_namespace(acc_id):
+    """Cache namespace for everything derived from one account's profile, follows and ratings"""
+    return f"profile:{acc_id}"
+
+
+def listing_cache_namespaces(acc_id):
+    """
+    Namespaces of the profiles whose cached followers, following or ratings
+    lists embed this account. Only identity changes (account and profile
+    saves) are fanned out this way; the follower and rating stats shown for
+    listed accounts change through counter updates that send no signal, so
+    those lag by up to API_CACHE_TIMEOUT.
+    """
+    related = set(Follow.objects.filter(follower_id=acc_id).values_list('following_id', flat=True))
+    related.update(Follow.objects.filter(following_id=acc_id).values_list('follower_id', flat=True))
+    related.update(Rating.objects.filter(rater_id=acc_id, status='active').values_list('rated_id', flat=True))
+    return [profile_cache_namespace(related_id) for related_id in related]
+
+
+@receiver(post_save, sender=Account)
+def invalidate_account_cache(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Logins don't change anything the profile responses render
+        return
+    bump_namespace(profile_cache_namespace(instance.pk), *listing_cache_namespaces(instance.pk))
+
+
+@receiver(post_delete, sender=Account)
+def invalidate_deleted_account_cache(sender, instance, **kwargs):
+    # Follows and ratings cascade first and bump the lists that showed the account
+    bump_namespace(profile_cache_namespace(instance.pk))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    bump_namespace(profile_cache_namespace(instance.user_id), *listing_cache_namespaces(instance.user_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_cache(sender, instance, **kwargs):
+    bump_namespace(
+        profile_cache_namespace(instance.follower_id),
+        profile_cache_namespace(instance.following_id),
+    )
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_rating_cache(sender, instance, **kwargs):
+    bump_namespace(profile_cache_namespace(instance.rated_id))
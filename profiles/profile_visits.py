@@ -1,9 +1,9 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta
 from profiles.models import ProfileVisit
+from profiles.visit_rollups import visit_summary, visit_totals
 from rest_framework.response import Response
 
 
@@ -17,27 +17,13 @@ def get_profile_visit_analytics(request):
     
     days = int(request.GET.get('days', 30))
     start_date = timezone.now() - timedelta(days=days)
+    summary = visit_summary(user, days)
     
     visits_queryset = ProfileVisit.objects.filter(
         profile_owner=user,
         created_at__gte=start_date
     )
     
-    total_visits = visits_queryset.count()
-    
-    authenticated_visitors = visits_queryset.exclude(visitor=None).values('visitor').distinct().count()
-    anonymous_ips = visits_queryset.filter(visitor=None).values('visitor_ip').distinct().count()
-    unique_visitors = authenticated_visitors + anonymous_ips
-    
-    authenticated_visits = visits_queryset.exclude(visitor=None).count()
-    anonymous_visits = visits_queryset.filter(visitor=None).count()
-    
-    daily_visits = visits_queryset.extra(
-        select={'day': 'date(created_at)'}
-    ).values('day').annotate(
-        count=Count('visit_id')
-    ).order_by('day')
-    
     recent_visitors = visits_queryset.exclude(visitor=None).select_related('visitor').order_by('-created_at')[:5]
     recent_visitor_data = []
     
@@ -50,13 +36,14 @@ def get_profile_visit_analytics(request):
     
     return Response({
         'profile_visits': {
-            'total_visits': total_visits,
-            'unique_visitors': unique_visitors,
-            'authenticated_visits': authenticated_visits,
-            'anonymous_visits': anonymous_visits,
+            'total_visits': summary['total_visits'],
+            'unique_visitors': summary['unique_visitors'],
+            'unique_visitors_error': summary['unique_visitors_error'],
+            'authenticated_visits': summary['authenticated_visits'],
+            'anonymous_visits': summary['anonymous_visits'],
             'description': 'Track how many users have viewed your profile.'
         },
-        'daily_visits': list(daily_visits),
+        'daily_visits': summary['daily_visits'],
         'recent_visitors': recent_visitor_data,
         'date_range': f'Last {days} days'
     })
@@ -70,35 +57,21 @@ def get_profile_visit_count(request):
     
     now = timezone.now()
     
-    # Last 24 hours
+    # Last 24 hours is a rolling window, counted from the raw (owner, created_at) index
     yesterday = now - timedelta(days=1)
     last_24h = ProfileVisit.objects.filter(
         profile_owner=user,
         created_at__gte=yesterday
     ).count()
     
-    # Last 7 days
-    week_ago = now - timedelta(days=7)
-    last_7_days = ProfileVisit.objects.filter(
-        profile_owner=user,
-        created_at__gte=week_ago
-    ).count()
-    
-    # Last 30 days
-    month_ago = now - timedelta(days=30)
-    last_30_days = ProfileVisit.objects.filter(
-        profile_owner=user,
-        created_at__gte=month_ago
-    ).count()
-    
-    # All time
-    all_time = ProfileVisit.objects.filter(profile_owner=user).count()
+    # Longer windows are calendar days summed from the daily rollups
+    totals = visit_totals(user, windows=(7, 30))
     
     return Response({
         'last_24_hours': last_24h,
-        'last_7_days': last_7_days,
-        'last_30_days': last_30_days,
-        'all_time': all_time
+        'last_7_days': totals['last_7'],
+        'last_30_days': totals['last_30'],
+        'all_time': totals['all_time']
     })
 
 
@@ -113,27 +86,14 @@ def get_recent_profile_visit_analytics(request):
     days = int(request.GET.get('days', 30))
     start_date = timezone.now() - timedelta(days=days)
     
-    # Base queryset
+    summary = visit_summary(user, days)
+    
+    # Raw visits are only read for the five most recent visitors
     visits_queryset = ProfileVisit.objects.filter(
         profile_owner=user,
         created_at__gte=start_date
     )
     
-    total_visits = visits_queryset.count()
-    
-    authenticated_visitors = visits_queryset.exclude(visitor=None).values('visitor').distinct().count()
-    anonymous_ips = visits_queryset.filter(visitor=None).values('visitor_ip').distinct().count()
-    unique_visitors = authenticated_visitors + anonymous_ips
-    
-    authenticated_visits = visits_queryset.exclude(visitor=None).count()
-    anonymous_visits = visits_queryset.filter(visitor=None).count()
-    
-    daily_visits = visits_queryset.extra(
-        select={'day': 'date(created_at)'}
-    ).values('day').annotate(
-        count=Count('visit_id')
-    ).order_by('day')
-    
     recent_visitors = visits_queryset.exclude(
         visitor=None
     ).select_related(
@@ -164,13 +124,14 @@ def get_recent_profile_visit_analytics(request):
     
     return Response({
         'profile_visits': {
-            'total_visits': total_visits,
-            'unique_visitors': unique_visitors,
-            'authenticated_visits': authenticated_visits,
-            'anonymous_visits': anonymous_visits,
+            'total_visits': summary['total_visits'],
+            'unique_visitors': summary['unique_visitors'],
+            'unique_visitors_error': summary['unique_visitors_error'],
+            'authenticated_visits': summary['authenticated_visits'],
+            'anonymous_visits': summary['anonymous_visits'],
             'description': 'Track how many users have viewed your profile.'
         },
-        # 'daily_visits': list(daily_visits),
+        # 'daily_visits': summary['daily_visits'],
         'recent_visitors': recent_visitor_data,
         'date_range': f'Last {days} days'
     })
\ No newline at end of file
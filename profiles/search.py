@@ -0,0 +1,144 @@
+"""
+User discovery search.
+
+Searchable accounts (verified and active) are mirrored into UserSearchEntry
+with casefolded, accent-stripped text. On MySQL queries go through the
+FULLTEXT ngram index, so any substring of a name, company or email matches
+without a table scan. The index is built with stopwords disabled (migration
+0010): the ngram parser drops every token containing a stopword, which with
+the default list ("a", "i", ...) would hide most names. Queries shorter than the ngram size, or running on
+another backend, use prefix/substring LIKE over the same normalized columns.
+Results are ranked by name prefix, company prefix, word prefix, then
+full-text relevance.
+"""
+import re
+import unicodedata
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from profiles.models import Account, UserProfile, UserSearchEntry
+
+# Characters with a meaning in MySQL boolean-mode full-text queries
+BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+MATCH_SQL = 'MATCH(full_name, company_name, email) AGAINST (%s IN BOOLEAN MODE)'
+
+# Saving only these fields can change an account's search entry
+ACCOUNT_SEARCH_FIELDS = frozenset({'full_name', 'email', 'is_verified', 'state'})
+PROFILE_SEARCH_FIELDS = frozenset({'company_name'})
+
+
+def normalize(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def is_searchable(account):
+    return account.is_verified and account.state == 1
+
+
+def build_entry_values(account):
+    profile = getattr(account, 'profile', None)
+    return {
+        'full_name': normalize(account.full_name)[:255],
+        'company_name': normalize(profile.company_name if profile else '')[:255],
+        'email': normalize(account.email)[:254],
+    }
+
+
+def index_account(account):
+    """Add, refresh or drop the account's search entry"""
+    if not is_searchable(account):
+        UserSearchEntry.objects.filter(user=account).delete()
+        return
+
+    values = build_entry_values(account)
+    current = UserSearchEntry.objects.filter(user=account).values(*values).first()
+    if current != values:
+        UserSearchEntry.objects.update_or_create(user=account, defaults=values)
+
+
+def rebuild_search_index(batch_size=1000):
+    """Re-sync every entry, e.g. after bulk updates that bypass signals. Returns the number indexed."""
+    UserSearchEntry.objects.exclude(user__is_verified=True, user__state=1).delete()
+
+    accounts = Account.objects.filter(is_verified=True, state=1).select_related('profile').order_by('pk')
+    conflict_options = {
+        'update_conflicts': True,
+        'update_fields': ['full_name', 'company_name', 'email', 'updated_at'],
+    }
+    if connection.features.supports_update_conflicts_with_target:
+        conflict_options['unique_fields'] = ['user']
+
+    indexed = 0
+    batch = []
+    for account in accounts.iterator(chunk_size=batch_size):
+        batch.append(UserSearchEntry(user=account, **build_entry_values(account)))
+        if len(batch) >= batch_size:
+            UserSearchEntry.objects.bulk_create(batch, **conflict_options)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        UserSearchEntry.objects.bulk_create(batch, **conflict_options)
+        indexed += len(batch)
+    return indexed
+
+
+def search_accounts(query, limit=20, exclude=None):
+    """Return acc_ids of searchable accounts matching `query`, best match first"""
+    terms = normalize(BOOLEAN_OPERATORS.sub(' ', query)).split()
+    if not terms:
+        return []
+
+    phrase = ' '.join(terms)
+    ngram_size = settings.USER_SEARCH_NGRAM_TOKEN_SIZE
+    fulltext_terms = [term for term in terms if len(term) >= ngram_size]
+
+    entries = UserSearchEntry.objects.all()
+    if exclude is not None:
+        entries = entries.exclude(user=exclude)
+
+    if len(phrase) < ngram_size:
+        # Too short for the ngram index; prefix LIKE can still use the B-tree indexes
+        entries = entries.filter(Q(full_name__istartswith=phrase) | Q(company_name__istartswith=phrase))
+        relevance = Value(0.0)
+    elif connection.vendor == 'mysql' and fulltext_terms:
+        against = ' '.join(f'+"{term}"' for term in fulltext_terms)
+        entries = entries.filter(RawSQL(MATCH_SQL, [against], output_field=BooleanField()))
+        relevance = RawSQL(MATCH_SQL, [against], output_field=FloatField())
+    else:
+        for term in terms:
+            entries = entries.filter(
+                Q(full_name__icontains=term) | Q(company_name__icontains=term) | Q(email__icontains=term)
+            )
+        relevance = Value(0.0)
+
+    prefix_rank = Case(
+        When(full_name__istartswith=phrase, then=Value(3)),
+        When(company_name__istartswith=phrase, then=Value(2)),
+        When(Q(full_name__icontains=f' {phrase}') | Q(company_name__icontains=f' {phrase}'), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    ranked = entries.annotate(prefix_rank=prefix_rank, relevance=relevance).order_by(
+        '-prefix_rank', '-relevance', 'full_name'
+    )
+    return list(ranked.values_list('user_id', flat=True)[:limit])
+
+
+@receiver(post_save, sender=Account)
+def index_saved_account(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not ACCOUNT_SEARCH_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: index_account(instance))
+
+
+@receiver(post_save, sender=UserProfile)
+def index_saved_profile(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not PROFILE_SEARCH_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: index_account(instance.user))
@@ -21,7 +21,8 @@ class BadgeSerializer(BaseModelSerializer):
 class UserProfileSerializer(BaseModelSerializer):
     class Meta:
         model = UserProfile
-        fields = '__all__'
+        # counters are exposed on AccountProfileSerializer, not inside the nested profile
+        exclude = ('followers_count', 'following_count', 'ratings_count', 'rating_sum')
         read_only_fields = ('profile_id', 'user', 'created_at', 'updated_at')
 
     def to_representation(self, instance):
@@ -34,6 +35,8 @@ class UserProfileSerializer(BaseModelSerializer):
 
 
 class AccountProfileSerializer(BaseModelSerializer):
+    select_related_fields = ('profile__badge',)
+
     profile = UserProfileSerializer(read_only=True)
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
@@ -79,16 +82,48 @@ class AccountProfileSerializer(BaseModelSerializer):
         
         return data
     
+    def get_profile_counters(self, obj):
+        # Accounts without a profile row fall back to counting directly
+        try:
+            return obj.profile
+        except UserProfile.DoesNotExist:
+            return None
+
+    def get_annotated_stat(self, obj, field):
+        # Set by ProfileStatsQuerysetMixin / annotate_profile_stats on list endpoints
+        return getattr(obj, f'annotated_{field}', None)
+
     def get_followers_count(self, obj):
-        return obj.followers.count()
+        annotated = self.get_annotated_stat(obj, 'followers_count')
+        if annotated is not None:
+            return annotated
+        profile = self.get_profile_counters(obj)
+        return profile.followers_count if profile else obj.followers.count()
     
     def get_following_count(self, obj):
-        return obj.following.count()
+        annotated = self.get_annotated_stat(obj, 'following_count')
+        if annotated is not None:
+            return annotated
+        profile = self.get_profile_counters(obj)
+        return profile.following_count if profile else obj.following.count()
     
     def get_ratings_count(self, obj):
+        annotated = self.get_annotated_stat(obj, 'ratings_count')
+        if annotated is not None:
+            return annotated
+        profile = self.get_profile_counters(obj)
+        if profile:
+            return profile.ratings_count
         return obj.received_ratings.filter(status='active').count()
     
     def get_average_rating(self, obj):
+        ratings_count = self.get_annotated_stat(obj, 'ratings_count')
+        if ratings_count is not None:
+            rating_sum = self.get_annotated_stat(obj, 'rating_sum') or 0
+            return round(rating_sum / ratings_count, 1) if ratings_count else 0.0
+        profile = self.get_profile_counters(obj)
+        if profile:
+            return profile.average_rating
         ratings = obj.received_ratings.filter(status='active')
         if ratings.exists():
             return round(ratings.aggregate(avg=models.Avg('rating_count'))['avg'], 1)
@@ -121,6 +156,9 @@ class ProfileUpdateSerializer(BaseModelSerializer):
         return value
 
 class FollowSerializer(BaseModelSerializer):
+    # Query plan for both nested AccountProfileSerializer instances (see shared.query_plan)
+    select_related_fields = ('follower__profile__badge', 'following__profile__badge')
+
     follower_info = AccountProfileSerializer(source='follower', read_only=True)
     following_info = AccountProfileSerializer(source='following', read_only=True)
     
@@ -129,6 +167,8 @@ class FollowSerializer(BaseModelSerializer):
         fields = ['follow_id', 'follower_info', 'following_info', 'created_at']
 
 class RatingSerializer(BaseModelSerializer):
+    select_related_fields = ('rater__profile__badge',)
+
     rater_info = AccountProfileSerializer(source='rater', read_only=True)
     
     class Meta:
@@ -0,0 +1,41 @@
+from celery import shared_task
+
+
+@shared_task
+def rebuild_search_index_task():
+    from .search import rebuild_search_index
+    from .autocomplete import rebuild_autocomplete_index
+
+    # Safety net for account changes made with queryset.update(), which skip the index signals
+    indexed = rebuild_search_index()
+    rebuild_autocomplete_index()
+    return f'Indexed {indexed} searchable accounts'
+
+
+@shared_task
+def reconcile_profile_counters_task():
+    from .counters import reconcile_profile_counters
+    return f'Fixed counters on {reconcile_profile_counters()} profiles'
+
+
+@shared_task
+def flush_profile_visits_task():
+    from .visit_tracking import flush_visit_buffer
+    return flush_visit_buffer()
+
+
+@shared_task
+def rollup_profile_visits_task():
+    from .visit_rollups import rollup_recent_visits
+    return f'Updated {rollup_recent_visits()} daily visit rollups'
+
+
+@shared_task
+def purge_profile_visits_task():
+    from .visit_retention import purge_expired_visits
+
+    removed, more_remaining = purge_expired_visits()
+    if more_remaining:
+        # Keep each run short; pick up the rest in a fresh task
+        purge_profile_visits_task.apply_async(countdown=60)
+    return f'Removed {removed} expired profile visits'
@@ -1,3 +1,155 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import Account, Badge
+from profiles.counters import record_follow, record_rating
+from profiles.models import Follow, Rating, UserProfile
+from profiles.search import search_accounts
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ListQueryCountTests(TestCase):
+    """Query counts of the profile list endpoints must not grow with the page size"""
+
+    def setUp(self):
+        cache.clear()
+        self.badge = Badge.objects.create(name='Verified Supplier')
+        self.viewer = self.create_account('viewer@example.com')
+        self.supplier = self.create_account('supplier@example.com')
+        self.client = APIClient()
+
+    def create_account(self, email):
+        account = Account.objects.create_user(email=email, password='Passw0rd!', full_name=email.split('@')[0])
+        UserProfile.objects.filter(user=account).update(badge=self.badge)
+        return account
+
+    def add_followers(self, count):
+        start = Follow.objects.filter(following=self.supplier).count()
+        for index in range(start, start + count):
+            follower = self.create_account(f'follower{index}@example.com')
+            Follow.objects.create(follower=follower, following=self.supplier)
+            record_follow(follower, self.supplier)
+            Rating.objects.create(rater=follower, rated=self.supplier, rating_count=4)
+            record_rating(self.supplier, 1, 4)
+
+    def count_queries(self, url):
+        # Fresh user instance so the viewer's profile is not already cached on it
+        self.client.force_authenticate(Account.objects.get(pk=self.viewer.pk))
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url, expected):
+        self.add_followers(1)
+        self.assertEqual(self.count_queries(url), expected)
+        self.add_followers(10)
+        self.assertEqual(self.count_queries(url), expected)
+
+    def test_followers_list(self):
+        # viewer profile (timezone), account lookup, page count, page rows
+        url = reverse('followers-list-by-id', kwargs={'acc_id': self.supplier.acc_id})
+        self.assert_constant_queries(url, 4)
+
+    def test_following_list(self):
+        url = reverse('following-list')
+        for index in range(11):
+            Follow.objects.create(follower=self.viewer, following=self.create_account(f'followed{index}@example.com'))
+        self.assertEqual(self.count_queries(url), 4)
+
+    def test_ratings_list(self):
+        url = reverse('ratings-list-by-id', kwargs={'acc_id': self.supplier.acc_id})
+        self.assert_constant_queries(url, 4)
+
+    def test_follow_rows_render_nested_badges_and_stats(self):
+        self.add_followers(2)
+        self.client.force_authenticate(self.viewer)
+        response = self.client.get(reverse('followers-list-by-id', kwargs={'acc_id': self.supplier.acc_id}))
+        row = response.data['results'][0]
+        self.assertEqual(row['following_info']['followers_count'], 2)
+        self.assertEqual(row['following_info']['average_rating'], 4.0)
+        self.assertEqual(row['follower_info']['profile']['badge']['name'], 'Verified Supplier')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ListCacheTests(TestCase):
+    """Cached lists embed other accounts, so their profile edits must invalidate them"""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = Account.objects.create_user(email='viewer@example.com', password='Passw0rd!', full_name='viewer')
+        self.supplier = Account.objects.create_user(email='supplier@example.com', password='Passw0rd!', full_name='supplier')
+        Follow.objects.create(follower=self.viewer, following=self.supplier)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def listed_names(self):
+        response = self.client.get(reverse('following-list'))
+        return [row['following_info']['full_name'] for row in response.data['results']]
+
+    def test_listed_account_rename(self):
+        self.assertEqual(self.listed_names(), ['supplier'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.supplier.full_name = 'Supplier Ltd'
+            self.supplier.save()
+        self.assertEqual(self.listed_names(), ['Supplier Ltd'])
+
+    def test_listed_profile_edit(self):
+        response = self.client.get(reverse('following-list'))
+        self.assertNotEqual(response.data['results'][0]['following_info']['profile']['company_name'], 'Supplier Ltd')
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = UserProfile.objects.get(user=self.supplier)
+            profile.company_name = 'Supplier Ltd'
+            profile.save()
+        response = self.client.get(reverse('following-list'))
+        self.assertEqual(response.data['results'][0]['following_info']['profile']['company_name'], 'Supplier Ltd')
+
+
+class SearchTests(TestCase):
+
+    def create_account(self, email, full_name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Account.objects.create_user(
+                email=email, password='Passw0rd!', full_name=full_name, is_verified=True, state=1
+            )
+
+    def test_names_made_of_stopword_letters(self):
+        # Every bigram here contains "a" or "i", which MySQL's default
+        # full-text stopword list would drop from the ngram index
+        maria = self.create_account('maria@example.com', 'Maria Ali')
+        self.create_account('other@example.com', 'Otto Berg')
+        self.assertEqual(search_accounts('maria ali'), [maria.acc_id])
+        self.assertEqual(search_accounts('ia'), [maria.acc_id])
+        self.assertEqual(search_accounts('Ali'), [maria.acc_id])
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.follower = Account.objects.create_user(email='follower@example.com', password='Passw0rd!')
+        self.supplier = Account.objects.create_user(email='supplier@example.com', password='Passw0rd!')
+
+    def counters(self, account):
+        return UserProfile.objects.values_list(
+            'followers_count', 'following_count', 'ratings_count', 'rating_sum'
+        ).get(user=account)
+
+    def test_decrement_stops_at_zero(self):
+        # Counters that already drifted to 0 must not fail the write
+        record_follow(self.follower, self.supplier, delta=-1)
+        record_rating(self.supplier, -1, -5)
+        self.assertEqual(self.counters(self.follower), (0, 0, 0, 0))
+        self.assertEqual(self.counters(self.supplier), (0, 0, 0, 0))
+
+    def test_decrement_below_current_value(self):
+        record_rating(self.supplier, 2, 9)
+        record_rating(self.supplier, -1, -4)
+        self.assertEqual(self.counters(self.supplier)[2:], (1, 5))
+        record_rating(self.supplier, -1, -7)
+        self.assertEqual(self.counters(self.supplier)[2:], (0, 0))
@@ -38,6 +38,7 @@ urlpatterns = [
     # path('featured-users/', views.featured_users, name='featured-users'),
     # Search
     path('search/', views.search_users, name='search-users'),
+    path('search/autocomplete/', views.autocomplete_users, name='autocomplete-users'),
 
 
     path('analytics/visits/', profile_visits.get_profile_visit_analytics, name='profile_visit_analytics'),
@@ -5,8 +5,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Avg
 from django.db import transaction
+from django.conf import settings
+from django.utils.decorators import method_decorator
 from accounts.models import Account 
-from profiles.models import UserProfile, Follow, Rating, ProfileVisit
+from profiles.models import UserProfile, Follow, Rating, ProfileVisit, profile_cache_namespace
 from profiles.serializers import (
     AccountProfileSerializer, ProfileUpdateSerializer, FollowSerializer,
     RatingSerializer, RatingCreateSerializer
@@ -23,59 +25,49 @@ from django.db.models import Exists, OuterRef
 
 from profiles.pagination import FeaturedUsersPagination
 from utils.get_client import get_client_ip, get_user_agent
+from shared.cache import cached_response
+from shared.query_plan import EagerLoadingMixin, apply_query_plan
+from profiles.counters import record_follow, record_rating
+from profiles.mixins import ProfileStatsQuerysetMixin, annotate_profile_stats
+from profiles.search import search_accounts
+from profiles.autocomplete import suggest
+from profiles.visit_tracking import track_profile_visit
 
 from django.contrib.auth import get_user_model    
 Account = get_user_model()
 
 
-def track_profile_visit(request, profile_owner):
-    try:
-        if request.user.is_authenticated and profile_owner == request.user:
-            return
-        
-        visitor = request.user if request.user.is_authenticated else None
-        visitor_ip = get_client_ip(request)
-        
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_visit_filter = Q(
-            profile_owner=profile_owner,
-            created_at__gte=thirty_days_ago
-        )
-        
-        if visitor:
-            recent_visit_filter &= Q(visitor=visitor)
-        else:
-            recent_visit_filter &= Q(visitor_ip=visitor_ip, visitor=None)
-        
-        if ProfileVisit.objects.filter(recent_visit_filter).exists():
-            return
-        
-        ProfileVisit.objects.create(
-            profile_owner=profile_owner,
-            visitor=visitor,
-            visitor_ip=visitor_ip
-        )
-        
-    except Exception:
-        pass
+def profile_namespaces(request, acc_id=None, **kwargs):
+    # Responses for a profile are invalidated together; anonymous "own profile" requests skip the cache
+    acc_id = acc_id or getattr(request.user, 'acc_id', None)
+    return [profile_cache_namespace(acc_id)] if acc_id else None
+
 
+cache_profile_response = cached_response(profile_namespaces, timeout=settings.API_CACHE_TIMEOUT)
 
 
 class ProfileDetailView(generics.RetrieveAPIView):
     serializer_class = AccountProfileSerializer
     permission_classes = [AllowAny]  # allow anonymous access
 
+    def get(self, request, *args, **kwargs):
+        acc_id = kwargs.get('acc_id')
+        if acc_id:
+            # Track the visit before the cache so hits are still counted
+            self.profile_user = get_object_or_404(Account, acc_id=acc_id)
+            track_profile_visit(request, self.profile_user)
+        return self.retrieve(request, *args, **kwargs)
+
+    @method_decorator(cache_profile_response)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_object(self):
         acc_id = self.kwargs.get('acc_id')
 
         if acc_id:
             # Anyone can fetch a profile by acc_id (for posts)
-            profile_user = get_object_or_404(Account, acc_id=acc_id)
-            
-            # Track the profile visit
-            track_profile_visit(self.request, profile_user)
-            
-            return profile_user
+            return self.profile_user
 
         # If no acc_id, return current user's profile (auth only)
         if self.request.user.is_authenticated:
@@ -109,10 +101,13 @@ class FollowUserView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        follow, created = Follow.objects.get_or_create(
-            follower=request.user,
-            following=user_to_follow
-        )
+        with transaction.atomic():
+            follow, created = Follow.objects.get_or_create(
+                follower=request.user,
+                following=user_to_follow
+            )
+            if created:
+                record_follow(request.user, user_to_follow)
         
         if created:
             return Response(
@@ -133,47 +128,66 @@ class UnfollowUserView(generics.GenericAPIView):
     def delete(self, request, acc_id):
         user_to_unfollow = get_object_or_404(Account, acc_id=acc_id)
         
-        try:
-            follow = Follow.objects.get(
+        with transaction.atomic():
+            # Only the request that actually deleted the row adjusts the counters
+            deleted, _ = Follow.objects.filter(
                 follower=request.user,
                 following=user_to_unfollow
-            )
-            follow.delete()
+            ).delete()
+            if deleted:
+                record_follow(request.user, user_to_unfollow, delta=-1)
+
+        if deleted:
             return Response(
                 {'message': 'Successfully unfollowed user'},
                 status=status.HTTP_200_OK
             )
-        except Follow.DoesNotExist:
+        else:
             return Response(
                 {'error': 'You are not following this user'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
 # get a list of followers
-class FollowersListView(generics.ListAPIView):
+class FollowersListView(ProfileStatsQuerysetMixin, EagerLoadingMixin, generics.ListAPIView):
     serializer_class = FollowSerializer
+    profile_stats_relations = ('follower', 'following')
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(cache_profile_response)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self):
         acc_id = self.kwargs.get('acc_id', self.request.user.acc_id)
         user = get_object_or_404(Account, acc_id=acc_id)
         return Follow.objects.filter(following=user).order_by('-created_at')
 
 # get a list of users being followed
-class FollowingListView(generics.ListAPIView):
+class FollowingListView(ProfileStatsQuerysetMixin, EagerLoadingMixin, generics.ListAPIView):
     serializer_class = FollowSerializer
+    profile_stats_relations = ('follower', 'following')
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(cache_profile_response)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self):
         acc_id = self.kwargs.get('acc_id', self.request.user.acc_id)
         user = get_object_or_404(Account, acc_id=acc_id)
         return Follow.objects.filter(follower=user).order_by('-created_at')
 
 # get ratings for a user
-class RatingsListView(generics.ListAPIView):
+class RatingsListView(ProfileStatsQuerysetMixin, EagerLoadingMixin, generics.ListAPIView):
     serializer_class = RatingSerializer
+    profile_stats_relations = ('rater',)
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(cache_profile_response)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self):
         acc_id = self.kwargs.get('acc_id', self.request.user.acc_id)
         user = get_object_or_404(Account, acc_id=acc_id)
@@ -200,32 +214,39 @@ class CreateRatingView(generics.CreateAPIView):
         if rater == rated:
             raise serializers.ValidationError("You cannot rate yourself.")
 
-        # Check for existing rating
-        existing_rating = Rating.objects.filter(rater=rater, rated=rated).first()
-
-        if existing_rating:
-            # Update existing rating
-            existing_rating.rating_count = data['rating_count']
-            existing_rating.review_content = data.get('review_content', '')
-            existing_rating.save()
-            self.instance = existing_rating  
-        else:
-            serializer.save(rater=rater)
+        with transaction.atomic():
+            # Check for existing rating, locked so concurrent edits apply their deltas in turn
+            existing_rating = Rating.objects.select_for_update().filter(rater=rater, rated=rated).first()
+
+            if existing_rating:
+                # Update existing rating
+                previous_count = existing_rating.rating_count
+                existing_rating.rating_count = data['rating_count']
+                existing_rating.review_content = data.get('review_content', '')
+                existing_rating.save()
+                self.instance = existing_rating  
+                if existing_rating.status == 'active':
+                    record_rating(rated, 0, existing_rating.rating_count - previous_count)
+            else:
+                rating = serializer.save(rater=rater)
+                record_rating(rated, 1, rating.rating_count)
 
 # get profile statistics
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_profile_response
 def profile_stats(request, acc_id=None):
     if acc_id:
         user = get_object_or_404(Account, acc_id=acc_id)
     else:
         user = request.user
     
+    profile = getattr(user, 'profile', None)
     stats = {
-        'followers_count': user.followers.count(),
-        'following_count': user.following.count(),
-        'ratings_count': user.received_ratings.filter(status='active').count(),
-        'average_rating': user.received_ratings.filter(status='active').aggregate(
+        'followers_count': profile.followers_count if profile else user.followers.count(),
+        'following_count': profile.following_count if profile else user.following.count(),
+        'ratings_count': profile.ratings_count if profile else user.received_ratings.filter(status='active').count(),
+        'average_rating': profile.average_rating if profile else user.received_ratings.filter(status='active').aggregate(
             avg=Avg('rating_count')
         )['avg'] or 0.0,
         'total_reviews': user.received_ratings.filter(
@@ -233,7 +254,7 @@ def profile_stats(request, acc_id=None):
             review_content__isnull=False
         ).exclude(review_content='').count(),
         'verification_status': user.is_verified,
-        'is_omc': getattr(user.profile, 'is_omc', False) if hasattr(user, 'profile') else False
+        'is_omc': getattr(profile, 'is_omc', False)
     }
     
     return Response(stats)
@@ -318,15 +339,15 @@ def search_users(request):
         )
     
     try:
+        acc_ids = search_accounts(query, limit=20, exclude=request.user)
         users = Account.objects.filter(
-            Q(full_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(profile__company_name__icontains=query),
+            acc_id__in=acc_ids,
             is_verified=True,
             state=1
-        ).exclude(
-            acc_id=request.user.acc_id  # Exclude current user from search
-        ).select_related('profile')[:20]
+        )
+        users = apply_query_plan(annotate_profile_stats(users), AccountProfileSerializer)
+        # Keep the search ranking order
+        users = sorted(users, key=lambda user: acc_ids.index(user.acc_id))
         
         serializer = AccountProfileSerializer(users, many=True)
         return Response(serializer.data)
@@ -339,6 +360,26 @@ def search_users(request):
 
 
 
+# typeahead suggestions: only id, display name and avatar, served from the autocomplete index
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autocomplete_users(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response([])
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 20)
+    except ValueError:
+        limit = 10
+
+    suggestions = suggest(query, limit=limit, exclude=request.user.acc_id)
+    for suggestion in suggestions:
+        if suggestion['avatar']:
+            suggestion['avatar'] = request.build_absolute_uri(suggestion['avatar'])
+    return Response(suggestions)
+
+
 
 # manage timezone endpoints
 from rest_framework.decorators import api_view, permission_classes
@@ -0,0 +1,231 @@
+"""
+Raw profile-visit retention.
+
+Analytics read the daily rollups, so raw ProfileVisit rows are only needed
+for PROFILE_VISIT_RETENTION_DAYS (recent visitors, the rolling 24h count and
+the inline dedup fallback). Older days are first rolled up, then removed.
+
+Unpartitioned tables are purged in bounded, oldest-first batches, each in its
+own short transaction. On MySQL, `manage.py partition_profile_visits` converts
+profile_visits to monthly RANGE partitions on created_at, after which whole
+expired months are dropped instantly and new months are added ahead of time.
+With PROFILE_VISIT_ARCHIVE on, removed rows are copied to
+profile_visits_archive first.
+"""
+import logging
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from profiles.models import ProfileVisit, ProfileVisitArchive, ProfileVisitDaily
+from profiles.visit_rollups import BACKFILL_CHUNK_DAYS, day_start, rollup_days
+
+logger = logging.getLogger(__name__)
+
+VISIT_TABLE = ProfileVisit._meta.db_table
+ARCHIVE_TABLE = ProfileVisitArchive._meta.db_table
+ARCHIVE_COLUMNS = 'visit_id, profile_owner_id, visitor_id, visitor_ip, created_at, archived_at'
+
+
+def retention_cutoff_day():
+    # Never purge inside the dedup window, the inline fallback still reads it
+    days = max(settings.PROFILE_VISIT_RETENTION_DAYS, settings.PROFILE_VISIT_DEDUP_DAYS)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def rollup_unfinished_days(first_day, last_day):
+    """
+    Roll up days in range that have no rollup written after the day ended.
+
+    Finished days are left alone: once a purge batch has removed part of a
+    day, recomputing it from the remaining raw rows would undercount.
+    """
+    finished = {
+        row['day'] for row in ProfileVisitDaily.objects.filter(day__range=(first_day, last_day))
+        .values('day').annotate(last_update=Max('updated_at')).order_by()
+        if row['last_update'] >= day_start(row['day'] + timedelta(days=1))
+    }
+    written = 0
+    day = first_day
+    while day <= last_day:
+        if day in finished:
+            day += timedelta(days=1)
+            continue
+        chunk_end = day
+        while (chunk_end < last_day and chunk_end + timedelta(days=1) not in finished
+               and (chunk_end - day).days + 1 < BACKFILL_CHUNK_DAYS):
+            chunk_end += timedelta(days=1)
+        written += rollup_days(day, chunk_end)
+        day = chunk_end + timedelta(days=1)
+    return written
+
+
+def archive_visits(visits):
+    ProfileVisitArchive.objects.bulk_create([
+        ProfileVisitArchive(
+            visit_id=visit.visit_id,
+            profile_owner_id=visit.profile_owner_id,
+            visitor_id=visit.visitor_id,
+            visitor_ip=visit.visitor_ip,
+            created_at=visit.created_at,
+        )
+        for visit in visits
+    ], ignore_conflicts=True)
+
+
+def purge_batch(cutoff, batch_size):
+    """Remove up to batch_size of the oldest expired visits. Returns the number removed."""
+    with transaction.atomic():
+        expired = ProfileVisit.objects.filter(created_at__lt=cutoff).order_by('created_at')
+        if settings.PROFILE_VISIT_ARCHIVE:
+            visits = list(expired[:batch_size])
+            archive_visits(visits)
+            visit_ids = [visit.visit_id for visit in visits]
+        else:
+            visit_ids = list(expired.values_list('visit_id', flat=True)[:batch_size])
+        if not visit_ids:
+            return 0
+        ProfileVisit.objects.filter(visit_id__in=visit_ids).delete()
+    return len(visit_ids)
+
+
+def purge_expired_visits(max_batches=None):
+    """
+    Roll up and remove raw visits older than the retention window.
+    Returns (rows_removed, more_remaining) so the caller can schedule another run.
+    """
+    cutoff_day = retention_cutoff_day()
+    cutoff = day_start(cutoff_day)
+    partitioned = is_partitioned()
+    if partitioned:
+        add_future_partitions()
+
+    oldest = ProfileVisit.objects.aggregate(oldest=Min('created_at'))['oldest']
+    if oldest is None or oldest >= cutoff:
+        return 0, False
+
+    # Make sure every expiring day is in the aggregates before its raw rows go
+    rollup_unfinished_days(timezone.localdate(oldest), cutoff_day - timedelta(days=1))
+
+    removed = 0
+    if partitioned:
+        removed += drop_expired_partitions(cutoff_day)
+
+    max_batches = max_batches or settings.PROFILE_VISIT_PURGE_MAX_BATCHES
+    batch_size = settings.PROFILE_VISIT_PURGE_BATCH_SIZE
+    for _ in range(max_batches):
+        purged = purge_batch(cutoff, batch_size)
+        removed += purged
+        if purged < batch_size:
+            return removed, False
+    return removed, ProfileVisit.objects.filter(created_at__lt=cutoff).exists()
+
+
+# MySQL partition management
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{next_month(month):%Y-%m-%d}'))"
+
+
+def list_partitions():
+    """[(name, upper bound as TO_DAYS() or 'MAXVALUE')] for profile_visits, empty if unpartitioned"""
+    if connection.vendor != 'mysql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [VISIT_TABLE]
+        )
+        return cursor.fetchall()
+
+
+def is_partitioned():
+    return bool(list_partitions())
+
+
+def to_days(day):
+    # MySQL TO_DAYS(): days since year 0
+    return day.toordinal() + 365
+
+
+def partitioning_sql(first_month, months_ahead):
+    """Statements converting profile_visits to monthly partitions from first_month on"""
+    last_month = month_start(timezone.localdate())
+    for _ in range(months_ahead):
+        last_month = next_month(last_month)
+
+    clauses = []
+    month = first_month
+    while month <= last_month:
+        clauses.append(partition_clause(month))
+        month = next_month(month)
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    return [
+        # Every unique key of a partitioned table must include the partitioning column
+        f"ALTER TABLE {VISIT_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (visit_id, created_at)",
+        f"ALTER TABLE {VISIT_TABLE} PARTITION BY RANGE (TO_DAYS(created_at)) ({', '.join(clauses)})",
+    ]
+
+
+def add_future_partitions(months_ahead=None):
+    """Split pmax so partitions exist for the next few months"""
+    months_ahead = months_ahead or settings.PROFILE_VISIT_PARTITION_MONTHS_AHEAD
+    bounded = [int(bound) for name, bound in list_partitions() if bound != 'MAXVALUE']
+    if not bounded:
+        return 0
+
+    # Upper bound of the newest partition is the first day of the month after it
+    month = date.fromordinal(max(bounded) - 365)
+    target = month_start(timezone.localdate())
+    for _ in range(months_ahead):
+        target = next_month(target)
+
+    clauses = []
+    while month <= target:
+        clauses.append(partition_clause(month))
+        month = next_month(month)
+    if not clauses:
+        return 0
+
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {VISIT_TABLE} REORGANIZE PARTITION pmax INTO ({', '.join(clauses)})")
+    return len(clauses) - 1
+
+
+def drop_expired_partitions(cutoff_day):
+    """Drop monthly partitions that lie entirely before cutoff_day. Returns the rows removed."""
+    expired = [
+        name for name, bound in list_partitions()
+        if bound != 'MAXVALUE' and int(bound) <= to_days(cutoff_day)
+    ]
+    removed = 0
+    with connection.cursor() as cursor:
+        for name in expired:
+            cursor.execute(f"SELECT COUNT(*) FROM {VISIT_TABLE} PARTITION ({name})")
+            removed += cursor.fetchone()[0]
+            if settings.PROFILE_VISIT_ARCHIVE:
+                cursor.execute(
+                    f"INSERT IGNORE INTO {ARCHIVE_TABLE} ({ARCHIVE_COLUMNS}) "
+                    f"SELECT visit_id, profile_owner_id, visitor_id, visitor_ip, created_at, UTC_TIMESTAMP(6) "
+                    f"FROM {VISIT_TABLE} PARTITION ({name})"
+                )
+            cursor.execute(f"ALTER TABLE {VISIT_TABLE} DROP PARTITION {name}")
+            logger.info(f"Dropped expired profile visit partition {name}")
+    return removed
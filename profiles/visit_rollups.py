@@ -0,0 +1,184 @@
+"""
+Daily profile-visit rollups.
+
+ProfileVisitDaily keeps one row per owner per day with the totals the
+analytics endpoints report, so those endpoints read at most one row per day
+in range instead of re-counting raw visits. A scheduled task recomputes the
+last PROFILE_VISIT_ROLLUP_LOOKBACK_DAYS days, each with one grouped query and
+an upsert. Buffered visits keep their original time and can land on an older
+day if the buffer could not be drained for a while, so the flush marks every
+day it wrote in a Redis set and the next run recomputes those days too.
+
+Ranges are calendar days in the current timezone: "last 7 days" is today and
+the six days before it, from midnight, rather than the rolling now - 7 days
+the endpoints counted over raw visits before rollups.
+
+Each row also stores a HyperLogLog sketch of its visitors. Unique visitors
+over a range come from merging those sketches, which costs the same however
+many raw visits the range held and keeps working after raw visits are purged.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from profiles.models import ProfileVisit, ProfileVisitDaily
+from utils.hyperloglog import HyperLogLog
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ('total_visits', 'authenticated_visits', 'anonymous_visits', 'unique_visitors')
+
+VISITOR_SKETCH_PRECISION = 12
+
+# Days recomputed per grouped query when backfilling history
+BACKFILL_CHUNK_DAYS = 31
+
+# ISO dates that received visits after they may have been rolled up
+DIRTY_DAYS_KEY = 'profile_visits:rollup_dirty_days'
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def visitor_token(visitor_id, visitor_ip):
+    # Same identity as the daily unique count: the account, or the IP for anonymous visits
+    return f"user:{visitor_id}" if visitor_id else f"ip:{visitor_ip}"
+
+
+def rollup_days(first_day, last_day):
+    """Recompute rollups for first_day..last_day inclusive. Returns the number of rows written."""
+    visits = ProfileVisit.objects.filter(
+        created_at__gte=day_start(first_day),
+        created_at__lt=day_start(last_day + timedelta(days=1)),
+    )
+    grouped = visits.annotate(day=TruncDate('created_at')).values('profile_owner', 'day').annotate(
+        total=Count('visit_id'),
+        authenticated=Count('visitor'),
+        unique_accounts=Count('visitor', distinct=True),
+        unique_ips=Count('visitor_ip', distinct=True, filter=Q(visitor__isnull=True)),
+    ).order_by()
+
+    rollups = [
+        ProfileVisitDaily(
+            profile_owner_id=row['profile_owner'],
+            day=row['day'],
+            total_visits=row['total'],
+            authenticated_visits=row['authenticated'],
+            anonymous_visits=row['total'] - row['authenticated'],
+            unique_visitors=row['unique_accounts'] + row['unique_ips'],
+        )
+        for row in grouped
+    ]
+
+    sketches = {}
+    visitors = visits.annotate(day=TruncDate('created_at')).values_list(
+        'profile_owner', 'day', 'visitor', 'visitor_ip'
+    ).distinct().order_by()
+    for owner_id, day, visitor_id, visitor_ip in visitors.iterator():
+        sketch = sketches.setdefault((owner_id, day), HyperLogLog(VISITOR_SKETCH_PRECISION))
+        sketch.add(visitor_token(visitor_id, visitor_ip))
+    for rollup in rollups:
+        rollup.visitor_sketch = sketches[(rollup.profile_owner_id, rollup.day)].to_bytes()
+
+    conflict_options = {
+        'update_conflicts': True,
+        'update_fields': [*ROLLUP_FIELDS, 'visitor_sketch', 'updated_at'],
+    }
+    if connection.features.supports_update_conflicts_with_target:
+        conflict_options['unique_fields'] = ['profile_owner', 'day']
+    ProfileVisitDaily.objects.bulk_create(rollups, batch_size=1000, **conflict_options)
+    return len(rollups)
+
+
+def visit_day(created_at):
+    return timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+
+
+def mark_days_dirty(client, visits):
+    """Record the days of visits written late so the next rollup recomputes them"""
+    days = {visit_day(visit.created_at).isoformat() for visit in visits}
+    if not days:
+        return
+    try:
+        client.sadd(DIRTY_DAYS_KEY, *days)
+    except Exception as e:
+        # The visits are committed; only days older than the lookback miss a recompute
+        logger.warning(f"Could not mark rollup days dirty: {str(e)}")
+
+
+def rollup_recent_visits():
+    today = timezone.localdate()
+    first_day = today - timedelta(days=settings.PROFILE_VISIT_ROLLUP_LOOKBACK_DAYS)
+    written = rollup_days(first_day, today)
+
+    try:
+        client = get_redis()
+        dirty = client.smembers(DIRTY_DAYS_KEY)
+        if dirty:
+            # Taken before recomputing: a day marked again meanwhile stays in the set
+            client.srem(DIRTY_DAYS_KEY, *dirty)
+    except Exception as e:
+        logger.warning(f"Rollup dirty days unavailable: {str(e)}")
+        return written
+
+    try:
+        for day in sorted(date.fromisoformat(day.decode()) for day in dirty):
+            if day < first_day:
+                written += rollup_days(day, day)
+    except Exception:
+        client.sadd(DIRTY_DAYS_KEY, *dirty)
+        raise
+    return written
+
+
+def backfill_rollups(first_day, last_day=None):
+    last_day = last_day or timezone.localdate()
+    written = 0
+    while first_day <= last_day:
+        chunk_end = min(first_day + timedelta(days=BACKFILL_CHUNK_DAYS - 1), last_day)
+        written += rollup_days(first_day, chunk_end)
+        first_day = chunk_end + timedelta(days=1)
+    return written
+
+
+def visit_summary(profile_owner, days=None):
+    """
+    Sum the owner's rollups over the last `days` calendar days (all time if None).
+
+    unique_visitors merges the daily HyperLogLog sketches, so a visitor seen on
+    several days counts once, within unique_visitors_error (relative standard
+    error). Rows rolled up before sketches existed fall back to summing the
+    exact daily uniques until `manage.py rollup_profile_visits` is rerun.
+    """
+    rollups = ProfileVisitDaily.objects.filter(profile_owner=profile_owner)
+    if days is not None:
+        rollups = rollups.filter(day__gt=timezone.localdate() - timedelta(days=days))
+    rows = list(rollups.order_by('day').values('day', 'visitor_sketch', *ROLLUP_FIELDS))
+
+    summary = {field: sum(row[field] for row in rows) for field in ROLLUP_FIELDS}
+    summary['unique_visitors_error'] = 0.0
+    if len(rows) > 1 and all(row['visitor_sketch'] for row in rows):
+        merged = HyperLogLog.merge(HyperLogLog.from_bytes(row['visitor_sketch']) for row in rows)
+        # The estimate can't be below the largest exact daily count
+        summary['unique_visitors'] = max(merged.count(), max(row['unique_visitors'] for row in rows))
+        summary['unique_visitors_error'] = round(merged.relative_error, 4)
+    summary['daily_visits'] = [{'day': row['day'], 'count': row['total_visits']} for row in rows]
+    return summary
+
+
+def visit_totals(profile_owner, windows):
+    """Total visits over each of the last `windows` calendar-day counts plus all time, in one query"""
+    today = timezone.localdate()
+    totals = ProfileVisitDaily.objects.filter(profile_owner=profile_owner).aggregate(
+        all_time=Sum('total_visits'),
+        **{
+            f'last_{days}': Sum('total_visits', filter=Q(day__gt=today - timedelta(days=days)))
+            for days in windows
+        }
+    )
+    return {key: value or 0 for key, value in totals.items()}
@@ -0,0 +1,194 @@
+"""
+Buffered profile-visit tracking.
+
+A profile view costs one Redis SET NX: the key marks the (owner, visitor)
+pair as counted for the dedup window, and only the first view in the window
+pushes an event onto a Redis list. A periodic Celery task drains the list and
+writes the visits with bulk_create, so the profile endpoint never touches
+the profile_visits table. If Redis is unreachable the visit is recorded
+synchronously with the previous exists() + INSERT path.
+
+The drain moves each batch onto a processing list and clears it only after
+the rows are committed. A failed write puts the batch back on the buffer,
+and a flush re-queues whatever a crashed one left behind, since the dedup
+key already set for those visits would keep them from being recorded again.
+A batch the database rejects for its data is retried row by row, and the
+rows that still fail are moved to a dead-letter list so they can't hold up
+later flushes.
+"""
+import ipaddress
+import json
+import logging
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from utils.get_client import get_client_ip
+from utils.redis_client import get_redis
+from profiles.models import Account, ProfileVisit
+from profiles.visit_rollups import mark_days_dirty
+
+logger = logging.getLogger(__name__)
+
+VISIT_BUFFER_KEY = 'profile_visits:buffer'
+VISIT_SEEN_PREFIX = 'profile_visits:seen'
+VISIT_PROCESSING_KEY = 'profile_visits:processing'
+VISIT_FLUSH_LOCK_KEY = 'profile_visits:flush_lock'
+VISIT_DEAD_LETTER_KEY = 'profile_visits:dead_letter'
+# Most recent dead-lettered events kept for inspection
+VISIT_DEAD_LETTER_SIZE = 10000
+
+
+def clean_ip(value):
+    """Normalized IP address, or None for anything else (the forwarded-for header is client controlled)"""
+    try:
+        return str(ipaddress.ip_address((value or '').strip()))
+    except ValueError:
+        return None
+
+
+def visit_seen_key(owner_id, visitor_id, visitor_ip):
+    visitor = f"user:{visitor_id}" if visitor_id else f"ip:{visitor_ip}"
+    return f"{VISIT_SEEN_PREFIX}:{owner_id}:{visitor}"
+
+
+def track_profile_visit(request, profile_owner):
+    if request.user.is_authenticated and profile_owner == request.user:
+        return
+
+    visitor_id = request.user.acc_id if request.user.is_authenticated else None
+    visitor_ip = clean_ip(get_client_ip(request))
+    event = {
+        'owner': profile_owner.acc_id,
+        'visitor': visitor_id,
+        'ip': visitor_ip,
+        'at': timezone.now().isoformat(),
+    }
+
+    try:
+        client = get_redis()
+        ttl = settings.PROFILE_VISIT_DEDUP_DAYS * 24 * 60 * 60
+        if client.set(visit_seen_key(event['owner'], visitor_id, visitor_ip), 1, nx=True, ex=ttl):
+            client.rpush(VISIT_BUFFER_KEY, json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Visit buffer unavailable, recording inline: {str(e)}")
+        record_visit(profile_owner, visitor_id, visitor_ip)
+
+
+def record_visit(profile_owner, visitor_id, visitor_ip):
+    """Synchronous fallback: dedup against the database and insert one row"""
+    try:
+        window_start = timezone.now() - timedelta(days=settings.PROFILE_VISIT_DEDUP_DAYS)
+        recent_visit_filter = Q(profile_owner=profile_owner, created_at__gte=window_start)
+
+        if visitor_id:
+            recent_visit_filter &= Q(visitor_id=visitor_id)
+        else:
+            recent_visit_filter &= Q(visitor_ip=visitor_ip, visitor=None)
+
+        if ProfileVisit.objects.filter(recent_visit_filter).exists():
+            return
+
+        ProfileVisit.objects.create(
+            profile_owner=profile_owner,
+            visitor_id=visitor_id,
+            visitor_ip=visitor_ip
+        )
+    except Exception:
+        pass
+
+
+def requeue_unflushed(client):
+    """Put the processing batch back at the head of the buffer"""
+    while client.lmove(VISIT_PROCESSING_KEY, VISIT_BUFFER_KEY, 'RIGHT', 'LEFT') is not None:
+        pass
+
+
+def take_batch(client, batch_size):
+    pipe = client.pipeline(transaction=False)
+    for _ in range(batch_size):
+        pipe.lmove(VISIT_BUFFER_KEY, VISIT_PROCESSING_KEY, 'LEFT', 'RIGHT')
+    return [item for item in pipe.execute() if item is not None]
+
+
+def dead_letter(client, item, error):
+    logger.error(f"Dropping buffered profile visit {item!r}: {error}")
+    pipe = client.pipeline()
+    pipe.rpush(VISIT_DEAD_LETTER_KEY, item)
+    pipe.ltrim(VISIT_DEAD_LETTER_KEY, -VISIT_DEAD_LETTER_SIZE, -1)
+    pipe.execute()
+
+
+def build_visit(event, existing):
+    return ProfileVisit(
+        profile_owner_id=event['owner'],
+        visitor_id=event['visitor'] if event['visitor'] in existing else None,
+        visitor_ip=clean_ip(event['ip']),
+        created_at=datetime.fromisoformat(event['at']),
+    )
+
+
+def write_visits(client, items):
+    """Insert the buffered events, dead-lettering the ones that can't be stored. Returns the rows written."""
+    events = []
+    for item in items:
+        try:
+            event = json.loads(item)
+            datetime.fromisoformat(event['at'])
+            events.append((item, event))
+        except (ValueError, KeyError, TypeError) as e:
+            dead_letter(client, item, e)
+
+    # Skip visits whose owner or visitor account was deleted while buffered
+    account_ids = {event['owner'] for _, event in events} | {event['visitor'] for _, event in events if event['visitor']}
+    existing = set(Account.objects.filter(acc_id__in=account_ids).values_list('acc_id', flat=True))
+    rows = [(item, build_visit(event, existing)) for item, event in events if event['owner'] in existing]
+
+    try:
+        with transaction.atomic():
+            ProfileVisit.objects.bulk_create([visit for _, visit in rows], batch_size=settings.PROFILE_VISIT_FLUSH_BATCH_SIZE)
+        mark_days_dirty(client, [visit for _, visit in rows])
+        return len(rows)
+    except (DataError, IntegrityError) as e:
+        logger.warning(f"Profile visit batch rejected, inserting row by row: {str(e)}")
+
+    # Connection and other operational errors still propagate and re-queue the batch
+    saved = []
+    for item, visit in rows:
+        try:
+            with transaction.atomic():
+                visit.save(force_insert=True)
+            saved.append(visit)
+        except (DataError, IntegrityError) as e:
+            dead_letter(client, item, e)
+    mark_days_dirty(client, saved)
+    return len(saved)
+
+
+def flush_visit_buffer():
+    """Drain buffered visits into profile_visits. Returns the number of rows written."""
+    client = get_redis()
+    if not client.set(VISIT_FLUSH_LOCK_KEY, 1, nx=True, ex=settings.PROFILE_VISIT_FLUSH_LOCK_TTL):
+        return 0
+
+    written = 0
+    try:
+        requeue_unflushed(client)
+        while True:
+            batch = take_batch(client, settings.PROFILE_VISIT_FLUSH_BATCH_SIZE)
+            if not batch:
+                break
+            try:
+                written += write_visits(client, batch)
+            except Exception:
+                requeue_unflushed(client)
+                raise
+            client.delete(VISIT_PROCESSING_KEY)
+            client.expire(VISIT_FLUSH_LOCK_KEY, settings.PROFILE_VISIT_FLUSH_LOCK_TTL)
+    finally:
+        client.delete(VISIT_FLUSH_LOCK_KEY)
+
+    if written:
+        logger.info(f"Flushed {written} buffered profile visits")
+    return written
@@ -0,0 +1,99 @@
+"""
+Namespace versioned caching.
+
+Cached entries embed the current version of every namespace they depend on
+(e.g. "profile:<acc_id>"). Invalidating a namespace just bumps its version,
+so all keys built from the old version are never read again and expire on
+their own TTL. No key scanning or pattern deletes are needed.
+"""
+import hashlib
+from functools import wraps
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from shared.tz_mixins import request_timezone
+
+NAMESPACE_VERSION_TIMEOUT = None  # version counters never expire
+
+
+def namespace_key(namespace):
+    return f"ns:{namespace}"
+
+
+def get_namespace_versions(namespaces):
+    keys = [namespace_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # add() never overwrites a version a concurrent bump just wrote
+        for key in missing:
+            cache.add(key, 1, NAMESPACE_VERSION_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 1) for key in keys]
+
+
+def bump_namespace(*namespaces):
+    """
+    Invalidate everything cached under the given namespaces once the current
+    transaction commits, so a concurrent read can't cache the data from
+    before the commit under the new version.
+    """
+    def bump():
+        for namespace in namespaces:
+            key = namespace_key(namespace)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 2, NAMESPACE_VERSION_TIMEOUT)
+
+    transaction.on_commit(bump)
+
+
+def versioned_key(prefix, namespaces, *parts):
+    versions = get_namespace_versions(namespaces)
+    stamp = ','.join(f"{namespace}@{version}" for namespace, version in zip(namespaces, versions))
+    digest = hashlib.md5('|'.join([stamp, *map(str, parts)]).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def display_timezone_key(request):
+    # BaseModelSerializer renders datetimes in the viewer's timezone, and
+    # anonymous viewers get ISO 8601 rather than the UTC display format
+    user_timezone = request_timezone(request)
+    return 'anonymous' if user_timezone is None else user_timezone.zone
+
+
+def cached_response(namespaces, timeout=60):
+    """
+    Read-through cache for DRF views returning serialized data.
+
+    `namespaces(request, *args, **kwargs)` returns the namespaces the response
+    depends on, or None to bypass the cache. Only 200 responses are stored and
+    the key varies on the full URL and the viewer's display timezone, with
+    anonymous viewers keyed apart. Use directly on function views (under
+    @api_view) or with method_decorator on class views.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            view_namespaces = namespaces(request, *args, **kwargs)
+            if not view_namespaces:
+                return view_func(request, *args, **kwargs)
+
+            key = versioned_key(
+                'view',
+                view_namespaces,
+                request.build_absolute_uri(),
+                display_timezone_key(request),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return Response(cached)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and hasattr(response, 'data'):
+                cache.set(key, response.data, timeout)
+            return response
+        return wrapper
+    return decorator
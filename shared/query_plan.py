@@ -0,0 +1,30 @@
+"""
+Serializer-declared query plans.
+
+A serializer lists the relations it walks when rendering a row:
+
+    class FollowSerializer(BaseModelSerializer):
+        select_related_fields = ('follower__profile__badge', ...)
+        prefetch_related_fields = ()
+
+and list views using EagerLoadingMixin apply that plan to their queryset, so
+the query count of a page does not grow with the number of rows.
+"""
+
+
+def apply_query_plan(queryset, serializer_class):
+    select_related_fields = getattr(serializer_class, 'select_related_fields', ())
+    prefetch_related_fields = getattr(serializer_class, 'prefetch_related_fields', ())
+    if select_related_fields:
+        queryset = queryset.select_related(*select_related_fields)
+    if prefetch_related_fields:
+        queryset = queryset.prefetch_related(*prefetch_related_fields)
+    return queryset
+
+
+class EagerLoadingMixin:
+    """Generic view mixin applying the serializer's declared query plan"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_query_plan(queryset, self.get_serializer_class())
@@ -1,47 +1,80 @@
+from functools import lru_cache
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
-from django.utils import timezone
 import pytz
 
+DISPLAY_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Datetime field names per serializer class, filled on first use
+_datetime_field_names = {}
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        return pytz.UTC
+
+
+def request_timezone(request):
+    """
+    The authenticated user's display timezone, resolved once per request and
+    stored on it. None for anonymous requests, whose datetimes stay ISO 8601.
+    """
+    if request is None:
+        return None
+    try:
+        return request._display_timezone
+    except AttributeError:
+        pass
+
+    user_timezone = None
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        try:
+            user_timezone = get_timezone(getattr(user.profile, 'timezone', 'UTC'))
+        except ObjectDoesNotExist:
+            user_timezone = pytz.UTC
+    request._display_timezone = user_timezone
+    return user_timezone
+
 
 class BaseModelSerializer(serializers.ModelSerializer):
     """
-    Base serializer that automatically converts all DateTimeFields 
+    Base serializer that automatically converts all DateTimeFields
     to the authenticated user's timezone for DISPLAY.
-    
+
+    The DateTimeFields of each serializer instance are pointed at the user's
+    timezone and display format, so DRF converts the datetime objects while
+    rendering them; a list serializer's child does this once for all rows.
     """
 
-    def to_representation(self, instance):
-        """Convert all datetime fields to user's timezone for display"""
-        data = super().to_representation(instance)
+    def datetime_field_names(self):
+        names = _datetime_field_names.get(type(self))
+        if names is None:
+            names = _datetime_field_names[type(self)] = tuple(
+                name for name, field in self.fields.items() if isinstance(field, serializers.DateTimeField)
+            )
+        return names
 
-        # Get user from request context
-        request = self.context.get('request')
-        if not (request and hasattr(request, 'user') and request.user.is_authenticated):
-            return data
+    def apply_display_timezone(self):
+        if getattr(self, '_display_timezone_applied', False):
+            return
+        self._display_timezone_applied = True
 
-        # Get user's timezone
-        user_tz = getattr(request.user.profile, 'timezone', 'UTC')
-        try:
-            user_timezone = pytz.timezone(user_tz)
-        except pytz.UnknownTimeZoneError:
-            user_timezone = pytz.UTC
+        user_timezone = request_timezone(self.context.get('request'))
+        if user_timezone is None:
+            return
+
+        fields = self.fields
+        for field_name in self.datetime_field_names():
+            field = fields.get(field_name)
+            if isinstance(field, serializers.DateTimeField):
+                field.timezone = user_timezone
+                field.format = DISPLAY_DATETIME_FORMAT
 
-        # Convert all DateTimeFields
-        for field_name, field in self.fields.items():
-            if isinstance(field, serializers.DateTimeField) and field_name in data:
-                if data[field_name]:
-                    try:
-                        dt = timezone.datetime.fromisoformat(data[field_name].replace('Z', '+00:00'))
-                        
-                        if timezone.is_naive(dt):
-                            dt = timezone.make_aware(dt, timezone.utc)
-
-                        # Convert to user's timezone for display
-                        user_dt = dt.astimezone(user_timezone)
-                        
-                        # Format for display
-                        data[field_name] = user_dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except (ValueError, TypeError):
-                        pass  # Keep original value if conversion fails
-
-        return data
\ No newline at end of file
+    def to_representation(self, instance):
+        """Convert all datetime fields to user's timezone for display"""
+        self.apply_display_timezone()
+        return super().to_representation(instance)
@@ -1,18 +1,102 @@
 import os
+import codecs
 import mimetypes
 from PIL import Image
 from io import BytesIO
+from types import MappingProxyType
+from functools import lru_cache
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.exceptions import ValidationError
 from django.conf import settings
 import subprocess
 import tempfile
 
+
+# Bytes read from the start of an upload to identify its real format
+SNIFF_HEADER_SIZE = 512
+
+# (offset, magic bytes, format) checked in order against the file header
+FILE_SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'GIF87a', 'gif'),
+    (0, b'GIF89a', 'gif'),
+    (0, b'%PDF-', 'pdf'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'\x1a\x45\xdf\xa3', 'matroska'),
+    (0, b'ID3', 'id3'),
+    (4, b'ftyp', 'isobmff'),
+    # Older QuickTime files start with another top-level atom instead of ftyp
+    (4, b'moov', 'quicktime'),
+    (4, b'mdat', 'quicktime'),
+    (4, b'wide', 'quicktime'),
+    (4, b'free', 'quicktime'),
+    (4, b'skip', 'quicktime'),
+    (4, b'pnot', 'quicktime'),
+)
+
+# Byte order marks of UTF-16/32 text, whose characters contain NUL bytes.
+# UTF-32 comes first since its little-endian mark starts with UTF-16's.
+TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+RIFF_FORMATS = {
+    b'WEBP': 'webp',
+    b'AVI ': 'avi',
+    b'WAVE': 'wav',
+}
+
+# Extensions each sniffed format may legitimately carry
+SIGNATURE_EXTENSIONS = MappingProxyType({
+    'jpeg': frozenset({'.jpg', '.jpeg'}),
+    'png': frozenset({'.png'}),
+    'gif': frozenset({'.gif'}),
+    'webp': frozenset({'.webp'}),
+    'isobmff': frozenset({'.mp4', '.mov'}),
+    'quicktime': frozenset({'.mov'}),
+    'matroska': frozenset({'.mkv', '.webm'}),
+    'avi': frozenset({'.avi'}),
+    'pdf': frozenset({'.pdf'}),
+    'ole': frozenset({'.doc'}),
+    'zip': frozenset({'.docx', '.xlsx'}),
+    'id3': frozenset({'.mp3', '.aac'}),
+    'mpeg_audio': frozenset({'.mp3'}),
+    'adts': frozenset({'.aac'}),
+    'wav': frozenset({'.wav'}),
+    'text': frozenset({'.txt', '.csv'}),
+})
+
+
+@lru_cache(maxsize=None)
+def extension_table():
+    """Frozen extension -> (file type, mime type) lookup built once from settings"""
+    table = {}
+    for file_type, extensions in (
+        ('image', settings.ALLOWED_IMAGE_EXTENSIONS),
+        ('video', settings.ALLOWED_VIDEO_EXTENSIONS),
+        ('file', settings.ALLOWED_DOCUMENT_EXTENSIONS),
+        ('audio', settings.ALLOWED_AUDIO_EXTENSIONS),
+    ):
+        for ext in extensions:
+            mime_type = mimetypes.guess_type(f"file{ext}")[0] or 'application/octet-stream'
+            table.setdefault(ext, (file_type, mime_type))
+    return MappingProxyType(table)
+
+
 class FileProcessor:
     """Handle file validation, compression, and processing"""
     
     @staticmethod
     def validate_file_size(file, file_type):
+        return FileProcessor.validate_size(file.size, file_type)
+
+    @staticmethod
+    def validate_size(size, file_type):
         size_limits = {
             'image': settings.MAX_IMAGE_SIZE,
             'video': settings.MAX_VIDEO_SIZE,
@@ -23,7 +107,7 @@ class FileProcessor:
         
         max_size = size_limits.get(file_type, settings.MAX_FILE_SIZE)
         
-        if file.size > max_size:
+        if size > max_size:
             max_size_mb = max_size / (1024 * 1024)
             raise ValidationError(
                 f'{file_type.capitalize()} file size must be less than {max_size_mb}MB'
@@ -34,17 +118,69 @@ class FileProcessor:
     @staticmethod
     def get_file_type(filename):
         ext = os.path.splitext(filename)[1].lower()
-        
-        if ext in settings.ALLOWED_IMAGE_EXTENSIONS:
-            return 'image'
-        elif ext in settings.ALLOWED_VIDEO_EXTENSIONS:
-            return 'video'
-        elif ext in settings.ALLOWED_DOCUMENT_EXTENSIONS:
-            return 'file'
-        elif ext in settings.ALLOWED_AUDIO_EXTENSIONS:
-            return 'audio'
-        else:
-            return 'document'
+        entry = extension_table().get(ext)
+        return entry[0] if entry else 'document'
+
+    @staticmethod
+    def get_mime_type(filename):
+        ext = os.path.splitext(filename)[1].lower()
+        entry = extension_table().get(ext)
+        return entry[1] if entry else 'application/octet-stream'
+
+    @staticmethod
+    def sniff_signature(file):
+        """Identify the real format from the header bytes only, without reading the whole file"""
+        file.seek(0)
+        header = file.read(SNIFF_HEADER_SIZE)
+        file.seek(0)
+
+        for offset, magic, signature in FILE_SIGNATURES:
+            if header[offset:offset + len(magic)] == magic:
+                return signature
+
+        if FileProcessor.is_wide_text(header):
+            return 'text'
+
+        if header[:4] == b'RIFF':
+            return RIFF_FORMATS.get(header[8:12])
+
+        if len(header) > 1 and header[0] == 0xFF:
+            if header[1] & 0xF6 == 0xF0:
+                return 'adts'
+            if header[1] & 0xE0 == 0xE0:
+                return 'mpeg_audio'
+
+        if header and b'\x00' not in header:
+            return 'text'
+
+        return None
+
+    @staticmethod
+    def is_wide_text(header):
+        """UTF-16/32 text with a byte order mark, checked before the NUL-byte heuristic rejects it"""
+        for bom, encoding in TEXT_BOMS:
+            if header.startswith(bom):
+                try:
+                    # The header may end mid-character
+                    text = codecs.getincrementaldecoder(encoding)().decode(header[len(bom):], final=False)
+                except UnicodeDecodeError:
+                    return False
+                return '\x00' not in text
+        return False
+
+    @staticmethod
+    def validate_file_signature(file, filename=None):
+        """Reject files whose content does not match their extension. Returns the mime type."""
+        filename = filename or file.name
+        ext = os.path.splitext(filename)[1].lower()
+        signature = FileProcessor.sniff_signature(file)
+
+        if signature is None or ext not in SIGNATURE_EXTENSIONS.get(signature, ()):
+            raise ValidationError(
+                f'File content does not match the {ext or "missing"} extension'
+            )
+
+        return FileProcessor.get_mime_type(filename)
     
     @staticmethod
     def compress_image(image_file):
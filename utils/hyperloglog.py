@@ -0,0 +1,71 @@
+import hashlib
+import math
+import zlib
+
+# Register value -> 2^-value, precomputed for the harmonic mean in count()
+INVERSE_POWERS = tuple(2.0 ** -value for value in range(65))
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch with 2^precision one-byte registers.
+
+    Sketches of the same precision merge losslessly by taking the register-wise
+    maximum, so per-day sketches can be combined into any date range. The
+    standard error of count() is 1.04 / sqrt(2^precision), about 1.6% at the
+    default precision of 12 (4KB of registers, much less once compressed).
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError(f'Expected {self.size} registers, got {len(self.registers)}')
+
+    @property
+    def relative_error(self):
+        return 1.04 / self.size ** 0.5
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    @classmethod
+    def merge(cls, sketches, precision=12):
+        sketches = list(sketches)
+        if not sketches:
+            return cls(precision)
+        if len(sketches) == 1:
+            return cls(sketches[0].precision, sketches[0].registers)
+        return cls(sketches[0].precision, bytes(map(max, *(sketch.registers for sketch in sketches))))
+
+    def count(self):
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(map(INVERSE_POWERS.__getitem__, self.registers))
+
+        # Small-range correction: linear counting while registers are still empty
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * size and empty:
+            estimate = size * math.log(size / empty)
+        return round(estimate)
+
+    def to_bytes(self):
+        # Sparse sketches are mostly zero registers and compress to a few bytes
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        return cls(data[0], zlib.decompress(data[1:]))
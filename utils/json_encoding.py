@@ -0,0 +1,82 @@
+"""
+Single-pass JSON encoding for API and WebSocket payloads.
+
+Serializer output can hold datetimes, dates, UUIDs, Decimals and lazy
+strings. Those are encoded where they appear instead of walking the payload
+first to stringify them. orjson is used when installed; otherwise the
+stdlib encoder does the same job with a `default` hook.
+
+dumps() returns the JSON text. to_primitive() returns plain dicts, lists,
+strings and numbers for transports that pack payloads themselves, such as
+the msgpack-based channel layer.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised where orjson isn't installed
+    orjson = None
+
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+
+def default(obj):
+    """Encode the non-JSON types found in serializer output"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS).decode()
+
+    def to_primitive(obj):
+        # Encoding and decoding in C beats a Python-level walk of the payload
+        return orjson.loads(orjson.dumps(obj, default=default, option=ORJSON_OPTIONS))
+
+    loads = orjson.loads
+
+else:
+    _encoder = json.JSONEncoder(default=default, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps_bytes(obj):
+        return _encoder.encode(obj).encode()
+
+    def dumps(obj):
+        return _encoder.encode(obj)
+
+    def to_primitive(obj):
+        if isinstance(obj, dict):
+            return {
+                key if isinstance(key, str) else str(key): (
+                    value if type(value) in PRIMITIVE_TYPES else to_primitive(value)
+                )
+                for key, value in obj.items()
+            }
+        if isinstance(obj, (list, tuple)):
+            return [item if type(item) in PRIMITIVE_TYPES else to_primitive(item) for item in obj]
+        if isinstance(obj, PRIMITIVE_TYPES):
+            return obj
+        return to_primitive(default(obj))
+
+    loads = json.loads